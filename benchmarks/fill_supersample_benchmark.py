@@ -0,0 +1,115 @@
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from configs.config import IconConfig, LawniconsPathConfig, PerformanceConfig
+from processors.fill_icon_processor import FillIconProcessor, FillRenderContext
+from processors.render_plan import RenderPlan
+
+
+def parse_args():
+    """解析命令行参数
+
+    支持的参数:
+        -test: 使用测试目录的SVG, 默认使用生产目录
+        -limit: 最多测试的图标数量, 默认200
+        -scale: 超采样倍数, 默认使用 PerformanceConfig.supersampling_scale
+
+    Example:
+        python benchmarks/fill_supersample_benchmark.py -test
+    """
+    parser = argparse.ArgumentParser(description="填充超采样与距离场边缘基准测试")
+    parser.add_argument("-test", action="store_true", help="使用测试目录")
+    parser.add_argument("-limit", type=int, default=200, help="最多测试的图标数量")
+    parser.add_argument(
+        "-scale",
+        type=float,
+        default=PerformanceConfig.supersampling_scale,
+        help="超采样倍数",
+    )
+    return parser.parse_args()
+
+
+def render(tasks, context):
+    """依次执行栅格化、蒙版、合成阶段, 返回图标数组与每个图标的耗时"""
+    stages = FillIconProcessor.render_stages()[:-1]  # 不含编码阶段
+    icons, elapsed = [], 0.0
+    for task in tasks:
+        start = time.perf_counter()
+        payload = None
+        for stage in stages:
+            payload = stage.func(task, context, payload)
+            if payload is None:
+                break
+        elapsed += time.perf_counter() - start
+        icons.append(None if payload is None else np.asarray(payload[0]))
+    return icons, elapsed / max(len(tasks), 1)
+
+
+def main():
+    args = parse_args()
+
+    PerformanceConfig.enable_raster_cache = False
+
+    svg_dir = LawniconsPathConfig.get_svg_dir(args.test)
+    svg_paths = sorted(svg_dir.glob("*.svg"))[: args.limit]
+    tasks, _ = RenderPlan.build({p.stem: p.stem for p in svg_paths}, svg_dir)
+    if not tasks:
+        print(f"未找到SVG: {svg_dir}")
+        return
+
+    def make_context(mode: str, enable_cache: bool) -> FillRenderContext:
+        return FillRenderContext(
+            IconConfig.fg_color,
+            "#3a4f66",
+            IconConfig.icon_size,
+            IconConfig.icon_scale,
+            args.scale,
+            enable_cache,
+            mode,
+        )
+
+    # 蒙版缓存写入临时目录, 不影响仓库中的缓存
+    temp_dir = Path(tempfile.mkdtemp())
+    PerformanceConfig.fill_mask_store = temp_dir / "cached_masks.bin"
+    PerformanceConfig.fill_mask_store_index = temp_dir / "cached_masks.idx"
+
+    results = {}
+    for mode in ("full", "mask", "sdf"):
+        # 未命中: 每个图标都计算蒙版
+        icons, cold = render(tasks, make_context(mode, False))
+        # 命中: 先预热蒙版缓存, 再计时
+        render(tasks, make_context(mode, True))
+        _, warm = render(tasks, make_context(mode, True))
+        results[mode] = (icons, cold, warm)
+
+    print(f"共 {len(tasks)} 个图标, 超采样倍数 {args.scale}\n")
+    print(f"{'方式':<6}{'蒙版未命中(ms/个)':>20}{'蒙版命中(ms/个)':>20}")
+    for mode, (_, cold, warm) in results.items():
+        print(f"{mode:<6}{cold * 1000:>20.2f}{warm * 1000:>20.2f}")
+
+    # 与整张图标超采样的逐通道差异
+    print()
+    for mode in ("mask", "sdf"):
+        diffs = [
+            np.abs(full.astype(np.int16) - icon.astype(np.int16))
+            for full, icon in zip(results["full"][0], results[mode][0])
+            if full is not None and icon is not None
+        ]
+        if not diffs:
+            continue
+        stacked = np.stack(diffs)
+        print(
+            f"{mode} 与 full 的差异: 最大 {stacked.max()}, 平均 {stacked.mean():.3f}, "
+            f"差异大于8的通道占比 {np.mean(stacked > 8) * 100:.3f}%, "
+            f"差异大于32的通道占比 {np.mean(stacked > 32) * 100:.3f}%"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import sys
+import time
+import argparse
+import lz4.frame
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from configs.config import PerformanceConfig
+from processors.mask_codec import MaskCodec
+from processors.mask_store import MaskStore
+
+
+def parse_args():
+    """解析命令行参数
+
+    支持的参数:
+        -limit: 最多测试的mask数量, 默认全部
+        -repeat: 解码重复次数, 默认3
+
+    Example:
+        先构建一次填充图标生成缓存, 再运行:
+            python build_filled.py -fg "#003a71" -bg "#a1cafe" -test
+            python benchmarks/mask_codec_benchmark.py
+    """
+    parser = argparse.ArgumentParser(description="蒙版编解码基准测试")
+    parser.add_argument("-limit", type=int, default=0, help="最多测试的mask数量")
+    parser.add_argument("-repeat", type=int, default=3, help="解码重复次数")
+    return parser.parse_args()
+
+
+def load_masks(limit: int):
+    """从蒙版存储读取mask"""
+    store = MaskStore(
+        PerformanceConfig.fill_mask_store, PerformanceConfig.fill_mask_store_index
+    ).open()
+    keys = sorted(store.keys())
+    if limit:
+        keys = keys[:limit]
+    masks = [store.get(key) for key in keys]
+    store.close()
+    return masks
+
+
+def main():
+    args = parse_args()
+    masks = load_masks(args.limit)
+    if not masks:
+        print(f"蒙版存储为空: {PerformanceConfig.fill_mask_store}, 请先构建一次填充图标")
+        return
+
+    raw_size = sum(mask.nbytes for mask in masks)
+    print(f"共 {len(masks)} 个mask, 原始大小 {raw_size / 1024 / 1024:.2f}MB\n")
+
+    # 旧版格式: 原始字节直接lz4压缩
+    codecs = {
+        "lz4 (旧版)": lambda m: lz4.frame.compress(m.tobytes()),
+        **{mode: (lambda m, mode=mode: MaskCodec.encode(m, mode)) for mode in MaskCodec.MODES},
+        "auto": lambda m: MaskCodec.encode(m, "auto"),
+    }
+
+    print(f"{'编码方式':<12}{'总大小(KB)':>12}{'压缩比':>10}{'编码(ms/个)':>14}{'解码(ms/个)':>14}")
+    for name, encode in codecs.items():
+        start = time.perf_counter()
+        payloads = [encode(mask) for mask in masks]
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for payload, mask in zip(payloads, masks):
+                MaskCodec.decode(payload, *mask.shape)
+        decode_time = (time.perf_counter() - start) / args.repeat
+
+        total_size = sum(len(payload) for payload in payloads)
+        print(
+            f"{name:<12}{total_size / 1024:>12.1f}{raw_size / total_size:>10.1f}"
+            f"{encode_time / len(masks) * 1000:>14.3f}{decode_time / len(masks) * 1000:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from configs.config import (
+    ArtifactPathConfig,
+    IconConfig,
+    LawniconsPathConfig,
+    PerformanceConfig,
+)
+from processors.fill_icon_processor import FillIconProcessor, FillRenderContext
+from processors.icon_zip_sink import IconZipSink
+from processors.outline_icon_processor import OutlineIconProcessor
+from processors.png_encoder import PngEncoder
+from processors.render_plan import RenderPlan
+from processors.theme_packer import ThemePacker
+
+
+def parse_args():
+    """解析命令行参数
+
+    支持的参数:
+        -test: 使用测试目录的SVG, 默认使用生产目录
+        -limit: 最多测试的图标数量, 默认200
+        -repeat: 编码重复次数, 默认3
+
+    Example:
+        python benchmarks/png_encode_benchmark.py -test
+    """
+    parser = argparse.ArgumentParser(description="PNG编码基准测试")
+    parser.add_argument("-test", action="store_true", help="使用测试目录")
+    parser.add_argument("-limit", type=int, default=200, help="最多测试的图标数量")
+    parser.add_argument("-repeat", type=int, default=3, help="编码重复次数")
+    return parser.parse_args()
+
+
+def render_icons(test_env: bool, limit: int):
+    """渲染待编码的图标: 轮廓 1.png 与填充 1.png"""
+    svg_paths = sorted(LawniconsPathConfig.get_svg_dir(test_env).glob("*.svg"))[:limit]
+    mapper = {svg_path.stem: svg_path.stem for svg_path in svg_paths}
+    tasks, _ = RenderPlan.build(mapper, LawniconsPathConfig.get_svg_dir(test_env))
+
+    fill_context = FillRenderContext(
+        IconConfig.fg_color,
+        "#3a4f66",
+        IconConfig.icon_size,
+        IconConfig.icon_scale,
+        PerformanceConfig.supersampling_scale,
+        False,
+    )
+    fill_stages = FillIconProcessor.render_stages()[:-1]  # 不含编码阶段
+
+    outlined, filled = [], []
+    for task in tasks:
+        icon = OutlineIconProcessor.render_line_layer(
+            str(task.svg_path),
+            task.content_hash,
+            IconConfig.fg_color,
+            IconConfig.icon_size,
+            IconConfig.icon_scale,
+        )
+        if icon is not None:
+            outlined.append(icon)
+
+        payload = None
+        for stage in fill_stages:
+            payload = stage.func(task, fill_context, payload)
+            if payload is None:
+                break
+        else:
+            filled.append(payload[0])
+    return outlined, filled
+
+
+def magisk_zip_size(pngs, background: bytes) -> int:
+    """按构建流程写入 icons 并打包Magisk模块, 返回模块压缩包大小"""
+    with tempfile.TemporaryDirectory(prefix="png_bench_") as temp_dir:
+        temp_dir = Path(temp_dir)
+        magisk_dir = temp_dir / "magisk"
+        shutil.copytree(ArtifactPathConfig.magisk_template_dir, magisk_dir)
+
+        icon_sink = IconZipSink(temp_dir / "icons.zip").open()
+        for i, png in enumerate(pngs):
+            icon_sink.write_icon(f"icon{i}", "0.png", background)
+            icon_sink.write_icon(f"icon{i}", "1.png", png)
+        icon_sink.write_tree(ArtifactPathConfig.icons_template_dir)
+        icon_sink.close()
+        os.replace(icon_sink.zip_path, magisk_dir / "icons")
+
+        target_magisk = temp_dir / "magisk_{timestamp}{theme_suffix}.zip"
+        with contextlib.redirect_stdout(io.StringIO()):
+            ThemePacker.pack_magisk_module(
+                str(magisk_dir), str(target_magisk), "benchmark", ""
+            )
+        return (temp_dir / "magisk_benchmark.zip").stat().st_size
+
+
+def main():
+    args = parse_args()
+    outlined, filled = render_icons(args.test, args.limit)
+    if not outlined:
+        print("未找到可渲染的SVG")
+        return
+
+    background = OutlineIconProcessor.create_background(
+        IconConfig.icon_size, IconConfig.bg_color
+    )
+    print(f"轮廓图标 {len(outlined)} 个, 填充图标 {len(filled)} 个\n")
+
+    print(
+        f"{'样式':<6}{'模式':<10}{'过滤':<10}{'调色板':<8}{'编码(ms/个)':>14}{'解码(ms/个)':>14}"
+        f"{'PNG总大小(KB)':>16}{'Magisk模块(KB)':>18}{'索引色':>8}"
+    )
+    for style, images in (("轮廓", outlined), ("填充", filled)):
+        for mode in PngEncoder.MODES:
+            for png_filter in PngEncoder.FILTERS:
+                for palette in (False, True):
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        pngs = [
+                            PngEncoder.encode(image, mode, png_filter, palette)
+                            for image in images
+                        ]
+                    encode_time = (time.perf_counter() - start) / args.repeat
+
+                    # 解码耗时近似设备上解包主题后加载图标的耗时
+                    start = time.perf_counter()
+                    for _ in range(args.repeat):
+                        for png in pngs:
+                            Image.open(io.BytesIO(png)).convert("RGBA")
+                    decode_time = (time.perf_counter() - start) / args.repeat
+
+                    background_bytes = PngEncoder.encode(
+                        background, mode, png_filter, palette
+                    )
+                    total_size = sum(len(png) for png in pngs)
+                    zip_size = magisk_zip_size(pngs, background_bytes)
+                    indexed = sum(png[25] == 3 for png in pngs)  # IHDR 颜色类型
+                    print(
+                        f"{style:<6}{mode:<10}{png_filter:<10}{str(palette):<8}"
+                        f"{encode_time / len(images) * 1000:>14.3f}"
+                        f"{decode_time / len(images) * 1000:>14.3f}"
+                        f"{total_size / 1024:>16.1f}{zip_size / 1024:>18.1f}"
+                        f"{indexed:>8}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
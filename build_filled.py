@@ -1,18 +1,25 @@
 import time
 import os
 import argparse
+import yaml
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 from processors.cleaner import Cleaner
 from processors.theme_packer import ThemePacker
 from processors.usage_counter import UsageCounter
 from processors.mapping_processor import MappingProcessor
+from processors.render_plan import RenderPlan, RenderTask
 from processors.fill_icon_processor import FillIconProcessor
+from processors.outline_icon_processor import OutlineIconProcessor
 from processors.fill_shortcut_processor import FillShortcutProcessor
 
 from configs.config import (
     ApiConfig,
     IconConfig,
     CleanConfig,
+    ThemeConfig,
     FillIconConfig,
     PerformanceConfig,
     ArtifactPathConfig,
@@ -26,9 +33,15 @@ def parse_args():
     支持的参数:
         -fg: 前景色, 例如 "#003a71"
         -bg: 背景色, 例如 "#a1cafe"
-        -fill: 填充色, 可选, 留空自动计算
+        -fill: 填充色, 可选, 留空自动计算。仅用于单个主题, 批量构建时使用主题列表中的 fill
         -test: 是否使用测试目录, 默认False
         -cache: 是否启用填充区域预计算缓存, 加速构建。默认True
+        -executor: 执行模式 thread/process, 默认thread。多核机器上process更快
+        -incremental: 是否增量构建, 仅重新渲染输入变化的图标。默认True
+        -png: PNG编码模式 fast/default/compact, 默认default。CI使用fast, 正式发布使用compact
+        -palette: 颜色不超过256种的图标是否写为索引色PNG。默认False
+        -themes: 批量构建主题列表文件, 每个主题生成一个Magisk模块。默认 configs/themes.yml
+        -clean: 构建前清除构建缓存目录(增量构建清单、栅格化缓存、SVG解析缓存)
 
     Example:
         启用缓存, 指定填充颜色，使用生产目录:
@@ -39,6 +52,8 @@ def parse_args():
             python build_filled.py -fg "#003a71" -bg "#a1cafe" -cache false -test
         启用缓存, 不指定填充颜色, 使用测试目录:
             python build_filled.py -fg "#003a71" -bg "#a1cafe" -test
+        批量构建 configs/themes.yml 中的所有主题:
+            python build_filled.py -themes
 
     """
     parser = argparse.ArgumentParser(description="构建Fill风格图标")
@@ -49,57 +64,88 @@ def parse_args():
     parser.add_argument(
         "-cache", type=str, default="true", help="是否启用填充区域预计算缓存 (true/false)"
     )
+    parser.add_argument(
+        "-executor",
+        type=str,
+        choices=["thread", "process"],
+        help="执行模式, thread 多线程 / process 多进程",
+    )
+    parser.add_argument(
+        "-incremental", type=str, help="是否增量构建 (true/false), 默认true"
+    )
+    parser.add_argument(
+        "-png",
+        type=str,
+        choices=["fast", "default", "compact"],
+        help="PNG编码模式, fast 最快 / default 默认 / compact 体积最小",
+    )
+    parser.add_argument(
+        "-palette", type=str, help="是否写为索引色PNG (true/false), 默认false"
+    )
+    parser.add_argument(
+        "-themes",
+        type=str,
+        nargs="?",
+        const=str(ArtifactPathConfig.themes_file),
+        help="批量构建主题列表文件, 默认 configs/themes.yml",
+    )
+    parser.add_argument("-clean", action="store_true", help="构建前清除构建缓存目录")
     return parser.parse_args()
 
 
-def build_filled(test_env: bool):
-    """构建Fill风格图标主题
-
-    用于构建Fill风格的图标主题
-        1. 清理临时文件
-        2. 处理图标映射
-        3. 处理锁屏快捷方式
-        4. 处理应用图标
-        5. 打包图标资源
-        6. 打包Magisk模块
-        7. 清理临时文件
+def load_themes(themes_file: str) -> List[ThemeConfig]:
+    """读取批量构建主题列表
 
     Args:
-        test_env: 是否使用测试环境
-            True: 使用test/目录下的测试文件
-            False: 使用lawnicons-develop/的完整文件
+        themes_file: 主题列表文件路径
 
-    工件输出:
-        - ./magisk_HyperMonetIcon_filled_{theme_name}_{timestamp}.zip
+    Returns:
+        List[ThemeConfig]: 主题列表
     """
-    print("test_env: ", test_env)
+    with open(themes_file, "r", encoding="utf-8") as f:
+        themes = (yaml.safe_load(f) or {}).get("themes") or []
 
-    # 运行前统计
-    UsageCounter.request_hits(ApiConfig.api_url_used, ApiConfig.api_headers)
+    return [
+        ThemeConfig(
+            name=str(theme["name"]),
+            fg_color=theme["fg"],
+            bg_color=theme["bg"],
+            fill_color=theme.get("fill") or "",
+        )
+        for theme in themes
+    ]
 
-    # 开始时间
-    start_time = time.time()
 
-    # 清理临时文件
-    print("(1/6) Cleaner: 运行前清理")
-    Cleaner.cleanup(CleanConfig.clean_up)
+def build_filled_theme(
+    test_env: bool,
+    theme: ThemeConfig,
+    target_magisk_pattern: str,
+    theme_suffix: str,
+    build_cache_dir: Optional[str],
+    mapper: Optional[Dict[str, str]] = None,
+    plan: Optional[Tuple[List[RenderTask], Dict[str, str]]] = None,
+):
+    """构建单个主题的图标并打包Magisk模块
 
-    # 处理映射
-    print("\n(2/6) MappingProcessor: 处理映射")
-    MappingProcessor.convert_icon_mapper(
-        str(LawniconsPathConfig.get_appfilter(test_env)),
-        str(ArtifactPathConfig.icon_mapper),
-        str(ArtifactPathConfig.icon_mapper_alt),
-    )
+    Args:
+        test_env: 是否使用测试环境
+        theme: 主题配置
+        target_magisk_pattern: Magisk模块文件名式
+        theme_suffix: 主题名称后缀
+        build_cache_dir: 增量构建缓存目录, 为None时全部重新渲染
+        mapper: 已解析的 {包名: 图标名} 映射, 为None时由 generate_icons 解析
+        plan: 渲染计划, 为None时由 generate_icons 生成
+    """
+    fill_color = theme.fill_color or FillIconConfig.auto_fill_color(theme.bg_color)
 
     # 处理锁屏快捷方式
     print("\n(3/6) FillShortcutProcessor: 处理锁屏快捷方式")
     FillShortcutProcessor.process_lock_shortcut(
         str(LawniconsPathConfig.get_svg_dir(test_env)),
         str(ArtifactPathConfig.icons_template_dir),
-        IconConfig.fg_color,
-        IconConfig.bg_color,
-        FillIconConfig(IconConfig.bg_color).fill_color,
+        theme.fg_color,
+        theme.bg_color,
+        fill_color,
         IconConfig.shortcut_icon_size,
         IconConfig.shortcut_icon_scale,
         PerformanceConfig.supersampling_scale,
@@ -107,29 +153,32 @@ def build_filled(test_env: bool):
 
     # 处理图标
     print("\n(4/6) FillIconProcessor: 处理图标")
+    icon_sink = ThemePacker.open_icons_zip(str(ArtifactPathConfig.icons_template_dir))
     FillIconProcessor.generate_icons(
         str(ArtifactPathConfig.icon_mapper),
         str(LawniconsPathConfig.get_svg_dir(test_env)),
-        str(ArtifactPathConfig.output_dir),
-        FillIconConfig(IconConfig.bg_color).fill_color,
-        IconConfig.fg_color,
-        IconConfig.bg_color,
+        icon_sink,
+        fill_color,
+        theme.fg_color,
+        theme.bg_color,
         IconConfig.icon_size,
         IconConfig.icon_scale,
         PerformanceConfig.supersampling_scale,
         PerformanceConfig.max_workers,
-        PerformanceConfig.batch_size_cv,
-        PerformanceConfig.batch_size_normal,
-        PerformanceConfig.array_pool_size,
-        PerformanceConfig.fill_workers,
         PerformanceConfig.background_cache_size,
         PerformanceConfig.enable_fill_mask_cache,
+        PerformanceConfig.executor_mode,
+        PerformanceConfig.process_workers,
+        PerformanceConfig.process_chunk_size,
+        build_cache_dir,
+        mapper,
+        plan,
     )
 
     # 打包icons资源
     print("\n(5/6) ThemePacker: 打包")
     ThemePacker.pack_icons_zip(
-        str(ArtifactPathConfig.output_dir),
+        icon_sink,
         str(ArtifactPathConfig.icons_template_dir),
         str(ArtifactPathConfig.mtz_template_dir),
         str(ArtifactPathConfig.magisk_template_dir),
@@ -138,9 +187,9 @@ def build_filled(test_env: bool):
     # 打包magisk模块
     ThemePacker.pack_magisk_module(
         str(ArtifactPathConfig.magisk_template_dir),
-        ArtifactPathConfig.target_magisk_pattern_filled,
+        target_magisk_pattern,
         ArtifactPathConfig.timestamp,
-        ArtifactPathConfig.theme_suffix,
+        theme_suffix,
     )
 
     # 打包mtz
@@ -151,6 +200,97 @@ def build_filled(test_env: bool):
     #     ArtifactPathConfig.theme_suffix,
     # )
 
+
+def build_filled(test_env: bool, themes: Optional[List[ThemeConfig]] = None):
+    """构建Fill风格图标主题
+
+    用于构建Fill风格的图标主题
+        1. 清理临时文件
+        2. 处理图标映射
+        3. 处理锁屏快捷方式
+        4. 处理应用图标
+        5. 打包图标资源
+        6. 打包Magisk模块
+        7. 清理临时文件
+
+    批量构建时, 步骤3~6对每个主题执行一次, 映射处理、渲染计划与清理只执行一次,
+    SVG栅格化结果与颜色无关, 在各主题间复用
+
+    Args:
+        test_env: 是否使用测试环境
+            True: 使用test/目录下的测试文件
+            False: 使用lawnicons-develop/的完整文件
+        themes: 批量构建的主题列表, 为None时按IconConfig构建单个主题
+
+    工件输出:
+        - ./magisk_HyperMonetIcon_filled_{theme_name}_{timestamp}.zip
+    """
+    print("test_env: ", test_env)
+
+    # 运行前统计
+    UsageCounter.request_hits(ApiConfig.api_url_used, ApiConfig.api_headers)
+
+    # 开始时间
+    start_time = time.time()
+
+    # 清理临时文件
+    print("(1/6) Cleaner: 运行前清理")
+    Cleaner.cleanup(CleanConfig.clean_up)
+
+    # 处理映射
+    print("\n(2/6) MappingProcessor: 处理映射")
+    MappingProcessor.convert_icon_mapper(
+        str(LawniconsPathConfig.get_appfilter(test_env)),
+        str(ArtifactPathConfig.icon_mapper),
+        str(ArtifactPathConfig.icon_mapper_alt),
+    )
+
+    build_cache_dir = (
+        PerformanceConfig.build_cache_dir
+        if PerformanceConfig.enable_incremental_build
+        else None
+    )
+
+    if themes is None:
+        # 单个主题
+        build_filled_theme(
+            test_env,
+            ThemeConfig(
+                ArtifactPathConfig.theme_name,
+                IconConfig.fg_color,
+                IconConfig.bg_color,
+                FillIconConfig(IconConfig.bg_color).fill_color,
+            ),
+            ArtifactPathConfig.target_magisk_pattern_filled,
+            ArtifactPathConfig.theme_suffix,
+            str(build_cache_dir) if build_cache_dir else None,
+        )
+    else:
+        # 批量构建, 映射与渲染计划与颜色无关, 只解析一次供各主题共用
+        mapper = OutlineIconProcessor.parse_icon_mapper(
+            str(ArtifactPathConfig.icon_mapper)
+        )
+        plan = RenderPlan.build(mapper, Path(LawniconsPathConfig.get_svg_dir(test_env)))
+
+        # 每个主题单独保存增量构建清单
+        for index, theme in enumerate(themes, 1):
+            print(
+                f"\n==== 主题 ({index}/{len(themes)}) {theme.name}: fg {theme.fg_color}, bg {theme.bg_color} ===="
+            )
+            build_filled_theme(
+                test_env,
+                theme,
+                ArtifactPathConfig.target_magisk_pattern_filled_batch,
+                f"_{theme.name}",
+                (
+                    str(build_cache_dir / "themes" / theme.name)
+                    if build_cache_dir
+                    else None
+                ),
+                mapper,
+                plan,
+            )
+
     # 运行后清理
     print("\n(6/6) Cleaner: 运行后清理")
     Cleaner.cleanup(CleanConfig.clean_up)
@@ -190,6 +330,25 @@ if __name__ == "__main__":
         else os.getenv("ENABLE_CACHE", "true").lower() == "true"
     )
 
+    # 执行模式
+    if args.executor:
+        PerformanceConfig.executor_mode = args.executor
+
+    # 是否增量构建
+    if args.incremental:
+        PerformanceConfig.enable_incremental_build = args.incremental.lower() == "true"
+
+    # PNG编码参数
+    if args.png:
+        PerformanceConfig.png_encode_mode = args.png
+    if args.palette:
+        PerformanceConfig.png_palette = args.palette.lower() == "true"
+
+    # 清除构建缓存
+    if args.clean:
+        Cleaner.cleanup([PerformanceConfig.build_cache_dir])
+
     # 是否使用测试目录
     test_env = args.test or os.getenv("TEST_ENV", "False").lower() == "true"
-    build_filled(test_env=test_env)
\ No newline at end of file
+    themes = load_themes(args.themes) if args.themes else None
+    build_filled(test_env=test_env, themes=themes)
\ No newline at end of file
@@ -25,6 +25,11 @@ def parse_args():
         -fg: 前景色, 例如 "#003a71"
         -bg: 背景色, 例如 "#a1cafe"
         -test: 是否使用测试目录, 默认False
+        -executor: 执行模式 thread/process, 默认thread。多核机器上process更快
+        -incremental: 是否增量构建, 仅重新渲染输入变化的图标。默认True
+        -png: PNG编码模式 fast/default/compact, 默认default。CI使用fast, 正式发布使用compact
+        -palette: 颜色不超过256种的图标是否写为索引色PNG。默认False
+        -clean: 构建前清除构建缓存目录(增量构建清单、栅格化缓存、SVG解析缓存)
     
     Example:
         使用生产目录:
@@ -36,6 +41,25 @@ def parse_args():
     parser.add_argument('-fg', type=str, help='前景色 (例如: "#003a71")')
     parser.add_argument('-bg', type=str, help='背景色 (例如: "#a1cafe")')
     parser.add_argument('-test', action='store_true', help='使用test测试目录')
+    parser.add_argument(
+        '-executor',
+        type=str,
+        choices=['thread', 'process'],
+        help='执行模式, thread 多线程 / process 多进程',
+    )
+    parser.add_argument(
+        '-incremental', type=str, help='是否增量构建 (true/false), 默认true'
+    )
+    parser.add_argument(
+        '-png',
+        type=str,
+        choices=['fast', 'default', 'compact'],
+        help='PNG编码模式, fast 最快 / default 默认 / compact 体积最小',
+    )
+    parser.add_argument(
+        '-palette', type=str, help='是否写为索引色PNG (true/false), 默认false'
+    )
+    parser.add_argument('-clean', action='store_true', help='构建前清除构建缓存目录')
     return parser.parse_args()
 
 
@@ -92,21 +116,30 @@ def build_outlined(test_env: bool):
 
     # 处理图标
     print("\n(4/6) OutlineIconProcessor: 处理图标")
+    icon_sink = ThemePacker.open_icons_zip(str(ArtifactPathConfig.icons_template_dir))
     OutlineIconProcessor.generate_icons(
         str(ArtifactPathConfig.icon_mapper),
         str(LawniconsPathConfig.get_svg_dir(test_env)),
-        str(ArtifactPathConfig.output_dir),
+        icon_sink,
         IconConfig.fg_color,
         IconConfig.bg_color,
         IconConfig.icon_size,
         IconConfig.icon_scale,
         PerformanceConfig.max_workers,
+        PerformanceConfig.executor_mode,
+        PerformanceConfig.process_workers,
+        PerformanceConfig.process_chunk_size,
+        (
+            str(PerformanceConfig.build_cache_dir)
+            if PerformanceConfig.enable_incremental_build
+            else None
+        ),
     )
 
     # 打包icons资源
     print("\n(5/6) ThemePacker: 打包")
     ThemePacker.pack_icons_zip(
-        str(ArtifactPathConfig.output_dir),
+        icon_sink,
         str(ArtifactPathConfig.icons_template_dir),
         str(ArtifactPathConfig.mtz_template_dir),
         str(ArtifactPathConfig.magisk_template_dir),
@@ -158,6 +191,24 @@ if __name__ == "__main__":
     elif os.getenv("BG_COLOR"):
         IconConfig.bg_color = os.getenv("BG_COLOR")
         
+    # 执行模式
+    if args.executor:
+        PerformanceConfig.executor_mode = args.executor
+
+    # 是否增量构建
+    if args.incremental:
+        PerformanceConfig.enable_incremental_build = args.incremental.lower() == "true"
+
+    # PNG编码参数
+    if args.png:
+        PerformanceConfig.png_encode_mode = args.png
+    if args.palette:
+        PerformanceConfig.png_palette = args.palette.lower() == "true"
+
+    # 清除构建缓存
+    if args.clean:
+        Cleaner.cleanup([PerformanceConfig.build_cache_dir])
+
     # 是否使用测试目录
     test_env = args.test or os.getenv("TEST_ENV", "False").lower() == "true"
     build_outlined(test_env=test_env)
@@ -36,16 +36,51 @@ class PerformanceConfig:
     max_workers: int = min(128, (os.cpu_count() or 1) * 4)
     # max_workers: int = 1
 
-    # (仅填充样式生效) 批处理大小, 一次读入batch_size个图标供max_workers处理
-    batch_size_cv: int = 256  # OpenCV优化的批处理大小
-    batch_size_normal: int = 128  # 普通模式的批处理大小
-
-    # (仅填充样式生效) 单个图标起始填充点并行数量
-    # fill_workers: int = min(4, (os.cpu_count() or 1))
-    fill_workers: int = 8
-
-    # (仅填充样式生效) NumPy 内存池大小
-    array_pool_size: int = 256
+    # (全部样式生效) 执行模式, "thread" 多线程 / "process" 多进程
+    # 图标渲染为CPU密集型任务, 多核机器上使用多进程可绕开GIL
+    executor_mode: str = os.getenv("EXECUTOR_MODE", "thread")
+
+    # (多进程模式生效) 进程数, 以及每次提交给单个进程的图标数
+    process_workers: int = os.cpu_count() or 1
+    process_chunk_size: int = 16
+
+    # (全部样式生效) 增量构建, 输入未变化的图标复用上次的渲染结果
+    # 构建缓存目录, 增量构建清单与下列缓存均位于其中, 使用 -clean 参数清除
+    enable_incremental_build: bool = os.getenv("INCREMENTAL", "true").lower() == "true"
+    build_cache_dir: Path = current_dir / "build_cache"
+
+    # (全部样式生效) 栅格化缓存, 保存与颜色无关的SVG alpha覆盖率, 切换主题时无需重新栅格化
+    # 位于 build_cache_dir/raster
+    enable_raster_cache: bool = True
+
+    # (全部样式生效) SVG解析缓存, 保存规范化并解析后的SVG, 跨构建复用, 命中时不再读取和解析SVG
+    # 位于 build_cache_dir/svg
+    enable_svg_cache: bool = True
+
+    # (全部样式生效) 内存中保留的解析后SVG数量, 每个约2KB, 默认可容纳全部Lawnicons图标
+    svg_cache_size: int = 8192
+
+    # (多线程模式生效) 渲染队列长度, 队列满时阻塞提交, 控制待处理图标占用的内存
+    render_queue_size: int = 256
+
+    # (多线程模式生效) 流水线各阶段线程数, 0 表示使用 max_workers
+    # 栅格化 -> 蒙版(仅填充样式) -> 合成(仅填充样式) -> 编码 -> 写入
+    rasterize_workers: int = 0
+    mask_workers: int = os.cpu_count() or 1
+    composite_workers: int = os.cpu_count() or 1
+    encode_workers: int = os.cpu_count() or 1
+    write_workers: int = 1
+
+    # (全部样式生效) PNG编码模式, 见 PngEncoder
+    #   fast 压缩快、体积大, 用于CI与日常调试; default Pillow默认; compact 体积最小, 用于正式发布
+    png_encode_mode: str = os.getenv("PNG_MODE", "default")
+    # (全部样式生效) PNG过滤方式, adaptive 逐行选择过滤器; none 跳过过滤器选择, 编码更快
+    png_filter: str = os.getenv("PNG_FILTER", "adaptive")
+    # (全部样式生效) 颜色不超过256种的图标无损写为索引色PNG, 体积更小, 解码更快
+    png_palette: bool = os.getenv("PNG_PALETTE", "false").lower() == "true"
+
+    # (多线程模式生效) 输出流水线各阶段的队列深度、利用率和吞吐统计
+    enable_pipeline_stats: bool = True
 
     # (仅填充样式生效) 背景缓存数量
     background_cache_size: int = 8
@@ -53,11 +88,55 @@ class PerformanceConfig:
     # (仅填充样式生效) 超采样倍数, 避免填充锯齿。越大越慢
     supersampling_scale: float = 1.5
 
+    # (仅填充样式生效) 超采样方式
+    #   full 线条与填充在超采样尺寸合成后整体缩小; mask 线条直接按目标尺寸栅格化, 只将填充区域缩小为覆盖率
+    #   sdf 不超采样, 填充区域在目标尺寸计算, 边缘覆盖率由距离场得到, 耗时与 supersampling_scale 无关
+    # mask 与 full 的允许偏差(预乘alpha后的RGBA): 逐通道平均差异不超过0.7, 差异大于32的通道不超过0.6%
+    # 由 tests/test_fill_supersample.py 使用 test/svgs 检查
+    fill_supersample_mode: str = os.getenv("FILL_SUPERSAMPLE", "full")
+
     # 填充区域缓存配置
-    fill_mask_cache_dir: Path = current_dir / ".cache" / "fill_masks"
-    fill_mask_cache_info: Path = current_dir / "cached_masks_info.yml"
-    fill_mask_cache_archive: Path = current_dir / "cached_masks.tar.lz4"
+    fill_mask_cache_info: Path = current_dir / "cached_masks_info.db"
+    fill_mask_cache_info_legacy: Path = current_dir / "cached_masks_info.yml"  # 旧版缓存信息, 首次运行时导入
+    fill_mask_store: Path = current_dir / "cached_masks.bin"  # 蒙版数据文件, 随仓库分发, 原地映射按需读取
+    fill_mask_store_index: Path = current_dir / "cached_masks.idx"  # 蒙版偏移索引
+    fill_mask_cache_archive: Path = current_dir / "cached_masks.tar.lz4"  # 旧版缓存归档, 不可随机读取, 存在时导入蒙版存储后删除
     enable_fill_mask_cache: bool = True
+    fill_mask_codec: str = "auto"  # 蒙版编码方式: auto/bits/rle/raw, 见 MaskCodec
+    fill_mask_lru_size: int = 64  # 内存中保留的已解码蒙版数量
+
+    @classmethod
+    def snapshot(cls) -> dict:
+        """获取当前配置的快照, 包含命令行参数修改后的值
+
+        Returns:
+            dict: {配置项: 值}
+        """
+        return {name: getattr(cls, name) for name in cls.__annotations__}
+
+    @classmethod
+    def restore(cls, snapshot: dict):
+        """还原配置快照, 供多进程模式的子进程使用
+
+        Args:
+            snapshot: snapshot() 的返回值
+        """
+        for name, value in snapshot.items():
+            setattr(cls, name, value)
+
+    @classmethod
+    def get_stage_workers(cls, stage: str, max_workers: int) -> int:
+        """获取流水线阶段的线程数
+
+        Args:
+            stage: 阶段名称, 对应 {stage}_workers 配置项
+            max_workers: 未配置或配置为0时使用的线程数
+
+        Returns:
+            int: 阶段线程数
+        """
+        workers = getattr(cls, f"{stage}_workers", 0)
+        return workers if workers > 0 else max_workers
 
 
 # 普通图标配置
@@ -119,6 +198,20 @@ class IconConfig:
     shortcut_icon_scale: float = 0.6
 
 
+# 批量构建主题配置
+@dataclass
+class ThemeConfig:
+    # 单个主题的配色, 由 build_filled.py -themes 从 themes_file 读取, 每个主题生成一个Magisk模块
+    #   name 主题名称, 拼入工件文件名 magisk_HyperMonetIcon_filled_{name}_{timestamp}.zip
+    #   fg_color/bg_color 含义同 IconConfig
+    #   fill_color 填充色, 留空时由背景色自动计算, 不使用 -fill 参数与 FILL_COLOR 环境变量
+    # 未使用 -themes 时, 按 IconConfig 构建单个主题
+    name: str  # 主题名称
+    fg_color: str  # 前景色
+    bg_color: str  # 背景色
+    fill_color: str = ""  # 填充色
+
+
 # 图标填充颜色
 class FillIconConfig:
     def __init__(self, bg_color: str):
@@ -133,7 +226,12 @@ class FillIconConfig:
             return self._custom_fill_color
 
         # 否则计算填充色
-        bg_rgb = tuple(int(self.bg_color[i : i + 2], 16) / 255.0 for i in (1, 3, 5))
+        return self.auto_fill_color(self.bg_color)
+
+    @staticmethod
+    def auto_fill_color(bg_color: str) -> str:
+        # 由背景色计算填充色, 不受 FILL_COLOR 环境变量影响
+        bg_rgb = tuple(int(bg_color[i : i + 2], 16) / 255.0 for i in (1, 3, 5))
         bg_h, bg_l, bg_s = colorsys.rgb_to_hls(*bg_rgb)
 
         is_pure_white = all(c > 0.99 for c in bg_rgb)
@@ -190,9 +288,6 @@ class ArtifactPathConfig:
     # 用于新增自定义图标映射, 请在icon_mapper_alt.xml中按格式添加
     icon_mapper_alt: Path = current_dir / "mappers" / "icon_mapper_alt.xml"
 
-    # 图标临时输出目录
-    output_dir: Path = current_dir / "output"
-
     # 模板目录
     icons_template_dir: Path = current_dir / "templates" / "icons_template"
     mtz_template_dir: Path = current_dir / "templates" / "mtz_template_HyperOS"
@@ -221,6 +316,16 @@ class ArtifactPathConfig:
         current_dir / f"magisk_HyperMonetIcon_outlined{theme_suffix}_{timestamp}.zip"
     )
 
+    # 批量构建输出文件名式, 主题名称由 pack_magisk_module 填入
+    target_magisk_pattern_filled_batch: str = str(
+        current_dir / "magisk_HyperMonetIcon_filled{theme_suffix}_{timestamp}.zip"
+    )
+
+    # 批量构建主题列表
+    # 用于 build_filled.py -themes 未指定文件时, 格式见 themes.yml 文件头注释
+    # 映射与渲染计划在各主题间共用, 增量构建清单按主题保存在 build_cache/themes/{name}
+    themes_file: Path = current_dir / "configs" / "themes.yml"
+
 
 # 运行次数反馈
 class ApiConfig:
@@ -0,0 +1,158 @@
+import json
+import hashlib
+import threading
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from processors.render_plan import RenderTask
+
+
+class BuildManifest:
+    """增量构建清单
+
+    记录每个包名对应图标的输入哈希, 并按输入哈希保存渲染结果:
+    1. 输入哈希 = SVG内容哈希 + 颜色/尺寸/缩放/超采样等渲染参数
+    2. 输入未变化的图标直接复用上次的 1.png, 不再渲染
+    3. 保存时删除不再被引用的渲染结果
+    """
+
+    # 清单格式版本号, 修改渲染算法使旧结果失效时需递增
+    VERSION = 2
+
+    def __init__(self, build_cache_dir: Path, params: Dict[str, Any]):
+        """
+        Args:
+            build_cache_dir: 构建缓存目录, 每种图标风格一个
+            params: 影响渲染结果的全部参数
+        """
+        self.build_cache_dir = Path(build_cache_dir)
+        self.manifest_path = self.build_cache_dir / "manifest.json"
+        self.icon_dir = self.build_cache_dir / "icons"
+        self.params = params
+
+        self._lock = threading.Lock()
+        self._previous: Dict[str, str] = {}
+        self._packages: Dict[str, str] = {}
+        self._task_hashes: Dict[str, str] = {}
+
+    def load(self) -> "BuildManifest":
+        """读取上次构建的清单, 参数不同时视为全部变更
+
+        Returns:
+            BuildManifest: self
+        """
+        try:
+            if self.manifest_path.exists():
+                manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+                if manifest.get("version") == self.VERSION:
+                    self._previous = manifest.get("packages", {})
+        except Exception as e:
+            print(f"    (err) 读取构建清单失败: {e}")
+        return self
+
+    def input_hash(self, task: RenderTask) -> str:
+        """计算渲染任务的输入哈希
+
+        Args:
+            task: 渲染任务
+
+        Returns:
+            str: 输入哈希
+        """
+        inputs = json.dumps(
+            {"version": self.VERSION, "svg": task.content_hash, **self.params},
+            sort_keys=True,
+        )
+        return hashlib.blake2b(inputs.encode(), digest_size=16).hexdigest()
+
+    def split(
+        self, tasks: List[RenderTask]
+    ) -> Tuple[List[Tuple[RenderTask, bytes]], List[RenderTask], Dict[str, int]]:
+        """将渲染任务分为可复用与需渲染两部分
+
+        Args:
+            tasks: 渲染任务列表
+
+        Returns:
+            Tuple[List[Tuple[RenderTask, bytes]], List[RenderTask], Dict[str, int]]:
+                (可复用的任务与图标字节, 需要渲染的任务, 按包名统计的变更数量)
+        """
+        reused, pending = [], []
+        summary = {"unchanged": 0, "changed": 0, "new": 0, "removed": 0}
+
+        for task in tasks:
+            input_hash = self.input_hash(task)
+            self._task_hashes[task.content_hash] = input_hash
+
+            for package_name in task.package_names:
+                previous = self._previous.get(package_name)
+                if previous == input_hash:
+                    summary["unchanged"] += 1
+                elif previous is None:
+                    summary["new"] += 1
+                else:
+                    summary["changed"] += 1
+
+            icon_bytes = self._read_icon(input_hash)
+            if icon_bytes is None:
+                pending.append(task)
+            else:
+                reused.append((task, icon_bytes))
+
+        current = {p for task in tasks for p in task.package_names}
+        summary["removed"] = len(self._previous.keys() - current)
+        return reused, pending, summary
+
+    def record(self, task: RenderTask, icon_bytes: bytes) -> None:
+        """记录图标的渲染结果
+
+        Args:
+            task: 渲染任务
+            icon_bytes: 编码后的图标 1.png
+        """
+        input_hash = self._task_hashes.get(task.content_hash)
+        if input_hash is None:
+            return
+
+        icon_path = self.icon_dir / f"{input_hash}.png"
+        if not icon_path.exists():
+            self.icon_dir.mkdir(parents=True, exist_ok=True)
+            temp_path = icon_path.with_suffix(".tmp")
+            temp_path.write_bytes(icon_bytes)
+            temp_path.replace(icon_path)
+
+        with self._lock:
+            for package_name in task.package_names:
+                self._packages[package_name] = input_hash
+
+    def save(self) -> None:
+        """保存清单, 并删除不再被引用的渲染结果"""
+        try:
+            self.build_cache_dir.mkdir(parents=True, exist_ok=True)
+            manifest = {
+                "version": self.VERSION,
+                "params": self.params,
+                "packages": dict(sorted(self._packages.items())),
+            }
+            temp_path = self.manifest_path.with_suffix(".tmp")
+            temp_path.write_text(
+                json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8"
+            )
+            temp_path.replace(self.manifest_path)
+
+            referenced = set(self._packages.values())
+            if self.icon_dir.exists():
+                for icon_path in self.icon_dir.glob("*.png"):
+                    if icon_path.stem not in referenced:
+                        icon_path.unlink()
+        except Exception as e:
+            print(f"    (err) 保存构建清单失败: {e}")
+
+    def _read_icon(self, input_hash: str) -> Optional[bytes]:
+        """读取上次构建的渲染结果"""
+        icon_path = self.icon_dir / f"{input_hash}.png"
+        try:
+            return icon_path.read_bytes()
+        except OSError:
+            return None
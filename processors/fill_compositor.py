@@ -0,0 +1,69 @@
+import numpy as np
+
+from PIL import Image, ImageColor
+
+
+class FillCompositor:
+    """填充图层合成器
+
+    以数组运算由填充区域生成填充图层, 并将其合成至线条图层之下:
+    1. 填充区域布尔数组或覆盖率 -> RGBA填充图层
+    2. alpha_composite 合成填充图层与线条图层
+    3. 超采样的填充区域可单独缩小为覆盖率, 线条图层无需超采样
+    """
+
+    @staticmethod
+    def build_fill_layer(fill_region: np.ndarray, fill_color: str) -> Image.Image:
+        """由填充区域生成填充图层
+
+        Args:
+            fill_region: 填充区域, shape为(H, W)的布尔数组, True表示需要填充;
+                或uint8覆盖率数组, 作为填充图层的alpha
+            fill_color: 填充色
+
+        Returns:
+            Image.Image: 填充区域为填充色, 其余部分全透明的RGBA图层
+        """
+        fill_rgba = np.array((*ImageColor.getrgb(fill_color)[:3], 255), np.uint8)
+
+        fill_array = np.zeros((*fill_region.shape, 4), dtype=np.uint8)
+        if fill_region.dtype == bool:
+            fill_array[fill_region] = fill_rgba
+        else:
+            fill_array[fill_region != 0, :3] = fill_rgba[:3]
+            fill_array[..., 3] = fill_region
+
+        return Image.fromarray(fill_array, "RGBA")
+
+    @staticmethod
+    def downsample_coverage(fill_region: np.ndarray, size: int) -> np.ndarray:
+        """将超采样的填充区域缩小为覆盖率
+
+        与整张图标超采样后 LANCZOS 缩小的边缘一致
+
+        Args:
+            fill_region: 填充区域, shape为(H, W)的布尔数组
+            size: 目标尺寸
+
+        Returns:
+            np.ndarray: shape为(size, size)的uint8覆盖率数组
+        """
+        region = Image.fromarray(fill_region.astype(np.uint8) * 255, "L")
+        return np.asarray(region.resize((size, size), Image.Resampling.LANCZOS))
+
+    @classmethod
+    def composite(
+        cls, line_icon: Image.Image, fill_region: np.ndarray, fill_color: str
+    ) -> Image.Image:
+        """将填充图层合成至线条图层之下
+
+        Args:
+            line_icon: 线条图层
+            fill_region: 填充区域, 尺寸需与线条图层一致
+            fill_color: 填充色
+
+        Returns:
+            Image.Image: 合成后的图像
+        """
+        fill_layer = cls.build_fill_layer(fill_region, fill_color)
+        return Image.alpha_composite(fill_layer, line_icon.convert("RGBA"))
@@ -1,85 +1,86 @@
-import os
 import threading
 import functools
-import hashlib
 import numpy as np
 import time
 
-try:
-    import cv2
-
-    USE_CV = True
-    print("OpenCV: 已启用 OpenCV 优化")
-except:
-    USE_CV = False
-    print("OpenCV: 未找到 OpenCV")
-
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-from PIL import Image, ImageColor, ImageDraw, ImageFilter
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from PIL import Image
 
+from processors.fill_compositor import FillCompositor
+from processors.fill_engine import FillEngine
+from processors.tint_engine import TintEngine
 from processors.outline_icon_processor import OutlineIconProcessor
+from processors.render_plan import RenderPlan, RenderTask
+from processors.icon_zip_sink import IconZipSink
+from processors.build_manifest import BuildManifest
+from processors.process_backend import ProcessRenderBackend
+from processors.render_scheduler import RenderScheduler, RenderStage
 from configs.config import PerformanceConfig
 from processors.mask_cache_manager import MaskCacheManager
 
+USE_CV = FillEngine.use_cv
+if USE_CV:
+    print("OpenCV: 已启用 OpenCV 优化")
+else:
+    print("OpenCV: 未找到 OpenCV, 使用 NumPy 实现")
+
+
+@dataclass(frozen=True)
+class FillRenderContext:
+    """填充风格图标的渲染上下文
+
+    Attributes:
+        fg_color: 前景色
+        fill_color: 填充色
+        icon_size: 图标尺寸
+        icon_scale: 图标缩放比例
+        supersampling_scale: 超采样比例
+        enable_cache: 是否启用填充区域缓存
+        supersample_mode: 超采样方式, full 整张图标超采样 / mask 仅超采样填充区域 /
+            sdf 不超采样, 由距离场计算填充边缘
+    """
+
+    fg_color: str
+    fill_color: str
+    icon_size: int
+    icon_scale: float
+    supersampling_scale: float
+    enable_cache: bool
+    supersample_mode: str = "full"
+
 
 class FillIconProcessor:
     """填充风格图标处理器
 
     用于生成填充风格图标
-    1. 多线程
-    2. 内存池复用
-    3. 填充蒙版缓存优化
-    4. OpenCV & Numpy加速
+    1. 多线程/多进程, 多线程模式使用常驻的渲染调度器
+    2. 填充蒙版缓存优化
+    3. OpenCV & Numpy加速
+    4. 相同图标只渲染一次
+    5. 增量构建, 输入未变化的图标复用上次结果
     """
 
     counter_lock = threading.Lock()
     processed_count = 0
-    _array_pool = []
-    _pool_lock = threading.Lock()
+    build_manifest: Optional[BuildManifest] = None
     _start_time = 0.0
     _last_update_time = 0.0
     _last_count = 0
 
     @classmethod
-    def get_array(cls, shape, dtype=np.uint8):
-        """从内存池获取或创建新的numpy数组
-
-        Args:
-            shape: 数组形状
-            dtype: 数据类型, 默认uint8
-
-        Returns:
-            np.ndarray: 初始化为0的数组
-        """
-        with cls._pool_lock:
-            if cls._array_pool:
-                arr = cls._array_pool.pop()
-                if arr.shape == shape and arr.dtype == dtype:
-                    arr.fill(0)
-                    return arr
-            return np.zeros(shape, dtype)
-
-    @classmethod
-    def release_array(cls, arr):
-        """释放数组回内存池
+    def increment_counter(cls, step: int = 1) -> int:
+        """增加处理计数
 
         Args:
-            arr: 要释放的numpy数组
-        """
-        with cls._pool_lock:
-            if len(cls._array_pool) < PerformanceConfig.array_pool_size:
-                cls._array_pool.append(arr)
-
-    @classmethod
-    def increment_counter(cls) -> int:
-        """增加处理计数
+            step: 增加的数量, 默认1
 
         Returns:
             int: 计数器
         """
         with cls.counter_lock:
-            cls.processed_count += 1
+            cls.processed_count += step
             return cls.processed_count
 
     @classmethod
@@ -149,210 +150,282 @@ class FillIconProcessor:
         return cls.get_cached_background_impl(icon_size, color)
 
     @classmethod
-    def get_cached_svg(
-        cls, svg_path: str, fg_color: str, size: int, scale: float
-    ) -> Image.Image:
-        """获取或SVG的PNG缓存
+    def rasterize_stage(
+        cls, task: RenderTask, context: FillRenderContext, _payload: None
+    ) -> Optional[np.ndarray]:
+        """栅格化阶段: 获取线条的alpha覆盖率
+
+        整张图标超采样时为超采样尺寸, 其余方式为目标尺寸。
+        线条为单色, 着色推迟到合成阶段, 蒙版阶段只读取alpha
 
         Args:
-            svg_path: SVG文件路径
-            fg_color: 前景色
-            size: 图标尺寸
-            scale: 缩放比例
+            task: 渲染任务
+            context: 渲染上下文
+            _payload: 无输入
 
         Returns:
-            Image.Image: 处理后的PNG图像
+            np.ndarray | None: shape为(H, W)的uint8数组, 失败返回None
         """
-        cache_key = f"{svg_path}_{fg_color}_{size}_{scale}"
-        cache_path = f".cache/{hashlib.md5(cache_key.encode()).hexdigest()}.png"
-
-        if os.path.exists(cache_path):
-            return Image.open(cache_path)
+        line_size = context.icon_size
+        if context.supersample_mode == "full":
+            line_size = int(context.icon_size * context.supersampling_scale)
+
+        line_alpha = OutlineIconProcessor.render_line_alpha(
+            str(task.svg_path),
+            task.content_hash,
+            line_size,
+            context.icon_scale,
+        )
 
-        icon = OutlineIconProcessor.process_svg(svg_path, fg_color, size, scale)
-        if icon:
-            os.makedirs(".cache", exist_ok=True)
-            icon.save(cache_path)
-        return icon
+        if line_alpha is None:
+            print(
+                f"    (err) FillIconProcessor.generate_icons: 处理线条失败 {task.drawable_name} ({task.display_name})"
+            )
+            return None
+        return line_alpha
 
     @classmethod
-    def process_single_icon(
-        cls,
-        package_name: str,
-        drawable_name: str,
-        svg_dir: Path,
-        output_dir: Path,
-        background: Image.Image,
-        fg_color: str,
-        fill_color: str,
-        icon_size: int,
-        icon_scale: float,
-        supersampling_scale: float,
-        total_icons: int,
-        fill_array: np.ndarray,
-        fill_workers: int,
-    ) -> bool:
-        """处理单个图标
+    def mask_stage(
+        cls, task: RenderTask, context: FillRenderContext, line_alpha: np.ndarray
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, bool, Optional[dict]]]:
+        """蒙版阶段: 读取缓存或由线条alpha计算线条二值图
 
         Args:
-            package_name: 应用包名
-            drawable_name: 图标资源名
-            svg_dir: SVG目录
-            output_dir: 输出目录
-            background: 背景图层
-            fg_color: 前景色
-            fill_color: 填充色
-            icon_size: 图标尺寸
-            icon_scale: 图标缩放比例
-            supersampling_scale: 超采样比例
-            total_icons: 总图标数
-            fill_array: 填充数组
-            fill_workers: 填充线程数
+            task: 渲染任务
+            context: 渲染上下文
+            line_alpha: 线条的alpha覆盖率
 
         Returns:
-            bool: 处理成功返回True
+            Tuple[np.ndarray, np.ndarray, bool, Optional[dict]] | None:
+                (线条alpha, 线条二值图, 是否使用了缓存, 新增的缓存记录), 失败返回None
         """
-        # 开始时间
-        process_start_time = time.time()
+        fg_color = context.fg_color
+        enable_cache = context.enable_cache
+        mask_record = None
 
-        svg_path = svg_dir / f"{drawable_name}.svg"
+        # 蒙版尺寸, 距离场方式直接使用目标尺寸
+        if context.supersample_mode == "sdf":
+            mask_size = context.icon_size
+        else:
+            mask_size = int(context.icon_size * context.supersampling_scale)
+        mask_scale = context.icon_scale
 
-        if not svg_path.exists():
-            print(
-                f"    (err) FillIconProcessor.generate_icons: 未找到对应svg文件 {drawable_name} ({package_name})"
-            )
-            return False
+        # 获取缓存键, 二值图由前景色的全部RGB分量决定
+        fg_rgb = TintEngine.parse_color(fg_color)
+        cache_key = MaskCacheManager.get_cache_key(
+            task.content_hash, mask_size, mask_scale, fg_rgb
+        )
+
+        # 加载缓存, 未命中时尝试迁移旧版缓存
+        binary_mask = None
+        used_cache = False
+        if enable_cache:
+            binary_mask = MaskCacheManager.load_mask(cache_key)
+            if binary_mask is None:
+                binary_mask, mask_record = MaskCacheManager.migrate_legacy_mask(
+                    str(task.svg_path), mask_size, mask_scale, fg_rgb, cache_key
+                )
+            if binary_mask is not None:
+                used_cache = True
 
-        icon_dir = output_dir / package_name
-        icon_dir.mkdir(exist_ok=True)
+        if binary_mask is None:
+            mask_alpha = line_alpha
+            if context.supersample_mode == "mask":
+                # 线条为目标尺寸, 蒙版未命中缓存时才栅格化超采样尺寸
+                mask_alpha = OutlineIconProcessor.render_line_alpha(
+                    str(task.svg_path), task.content_hash, mask_size, mask_scale
+                )
+                if mask_alpha is None:
+                    print(
+                        f"    (err) FillIconProcessor.generate_icons: 处理线条失败 {task.drawable_name} ({task.display_name})"
+                    )
+                    return None
+            # 只处理alpha一个通道, 与着色后的线条图层计算结果一致
+            binary_mask = FillEngine.alpha_mask(mask_alpha, fg_rgb)
+            if enable_cache:
+                mask_record = MaskCacheManager.save_mask(binary_mask, cache_key)
 
-        background.save(icon_dir / "0.png", "PNG")
+        return line_alpha, binary_mask, used_cache, mask_record
 
-        # 超采样尺寸
-        ss_size = int(icon_size * supersampling_scale)
-        ss_scale = icon_scale
+    @classmethod
+    def composite_stage(
+        cls,
+        task: RenderTask,
+        context: FillRenderContext,
+        masked: Tuple[np.ndarray, np.ndarray, bool, Optional[dict]],
+    ) -> Tuple[Image.Image, Tuple[bool, Optional[dict]]]:
+        """合成阶段: 计算填充区域, 着色线条并合成填充层, 得到目标尺寸的图标
 
-        line_icon = cls.get_cached_svg(str(svg_path), fg_color, ss_size, ss_scale)
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+            masked: 蒙版阶段的输出
 
-        if not line_icon:
-            print(
-                f"    (err) FillIconProcessor.generate_icons: 处理线条失败 {drawable_name} ({package_name})"
+        Returns:
+            Tuple[Image.Image, Tuple[bool, Optional[dict]]]:
+                (最终图标, (是否使用了缓存, 新增的缓存记录))
+        """
+        line_alpha, binary_mask, used_cache, mask_record = masked
+        line_icon = TintEngine.tint_alpha(line_alpha, context.fg_color)
+
+        # 所有未与边界连通的背景区域
+        fill_region = FillEngine.border_fill_region(binary_mask)
+
+        if context.supersample_mode == "full":
+            # 整张图标在超采样尺寸合成后缩小
+            final_icon = FillCompositor.composite(
+                line_icon, fill_region, context.fill_color
             )
-            return False
+            final_icon = final_icon.resize(
+                (context.icon_size, context.icon_size), Image.Resampling.LANCZOS
+            )
+        else:
+            if context.supersample_mode == "sdf":
+                # 目标尺寸的填充区域, 边缘覆盖率由距离场得到
+                coverage = FillEngine.edge_coverage(fill_region)
+            else:
+                # 只缩小填充区域, 以覆盖率合成至目标尺寸的线条图层之下
+                coverage = FillCompositor.downsample_coverage(
+                    fill_region, context.icon_size
+                )
+            final_icon = FillCompositor.composite(
+                line_icon, coverage, context.fill_color
+            )
+        return final_icon, (used_cache, mask_record)
 
-        fill_layer = Image.new("RGBA", line_icon.size, (0, 0, 0, 0))
-        fill_color_rgba = ImageColor.getrgb(fill_color)
+    @classmethod
+    def encode_stage(
+        cls,
+        task: RenderTask,
+        context: FillRenderContext,
+        composited: Tuple[Image.Image, Tuple[bool, Optional[dict]]],
+    ) -> Tuple[bytes, Tuple[bool, Optional[dict]]]:
+        """编码阶段: 将图标编码为PNG字节
 
-        # 获取缓存路径
-        cache_path = MaskCacheManager.get_cache_path(str(svg_path), ss_size)
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+            composited: 合成阶段的输出
 
-        # 加载缓存
-        binary_mask = None
-        used_cache = False
-        if PerformanceConfig.enable_fill_mask_cache:
-            binary_mask = MaskCacheManager.load_mask(cache_path)
-            if binary_mask is not None:
-                used_cache = True
+        Returns:
+            Tuple[bytes, Tuple[bool, Optional[dict]]]:
+                (编码后的PNG字节, (是否使用了缓存, 新增的缓存记录))
+        """
+        final_icon, extra = composited
+        return RenderPlan.encode_png(final_icon), extra
 
-        compute_start_time = time.time()
+    @classmethod
+    def write_stage(
+        cls,
+        task: RenderTask,
+        context: FillRenderContext,
+        rendered: Tuple[bytes, Tuple[bool, Optional[dict]]],
+        icon_sink: IconZipSink,
+        background_bytes: bytes,
+        total_icons: int,
+    ) -> Optional[bool]:
+        """写入阶段: 分发渲染结果并更新进度
 
-        if binary_mask is None:
-            # OpenCV 处理
-            if USE_CV:
-                cv_image = np.array(line_icon)
-                cv_image = cv2.cvtColor(cv_image, cv2.COLOR_RGBA2BGR)
-                smoothed = cv2.GaussianBlur(cv_image, (5, 5), 0.8)
-                gray = cv2.cvtColor(smoothed, cv2.COLOR_BGR2GRAY)
-                binary_mask = cv2.threshold(gray, 20, 255, cv2.THRESH_BINARY)[1]
-                kernel = np.ones((3, 3), np.uint8)
-                binary_mask = cv2.morphologyEx(binary_mask, cv2.MORPH_CLOSE, kernel)
-
-                compute_time = time.time() - compute_start_time
-
-                if PerformanceConfig.enable_fill_mask_cache:
-                    MaskCacheManager.save_mask(binary_mask, cache_path)
-
-                binary_mask = Image.fromarray(binary_mask)
-            else:
-                # 原始处理
-                smoothed = line_icon.filter(ImageFilter.GaussianBlur(0.8))
-                binary_mask = smoothed.convert("L").point(
-                    lambda x: 255 if x > 20 else 0
-                )
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+            rendered: 编码阶段的输出
+            icon_sink: 图标压缩包写入器
+            background_bytes: 编码后的背景 0.png
+            total_icons: 总图标数
 
-        # 填充点
-        width, height = (
-            binary_mask.size
-            if isinstance(binary_mask, Image.Image)
-            else binary_mask.shape
-        )
-        start_points = [
-            (0, 0),
-            (width - 1, 0),
-            (0, height - 1),
-            (width - 1, height - 1),  # 四角
-            (width // 2, 0),
-            (width // 2, height - 1),
-            (0, height // 2),
-            (width - 1, height // 2),  # 边中点
-        ]
+        Returns:
+            bool | None: 处理成功返回True, 失败返回None
+        """
+        icon_bytes, (used_cache, _) = rendered
+        if cls.finish_task(
+            task, icon_bytes, used_cache, icon_sink, background_bytes, total_icons
+        ):
+            return True
+        return None
 
-        # 填充处理
-        if USE_CV:
-            # 确保binary_mask是numpy数组
-            if isinstance(binary_mask, Image.Image):
-                binary_mask = np.array(binary_mask)
+    @classmethod
+    def render_stages(cls, max_workers: int = 1) -> List[RenderStage]:
+        """渲染流水线: 栅格化 -> 蒙版 -> 合成 -> 编码
 
-            fill_array = np.array(binary_mask)
-            mask = np.zeros(
-                (fill_array.shape[0] + 2, fill_array.shape[1] + 2), np.uint8
+        Args:
+            max_workers: 未单独配置线程数的阶段使用的线程数
+
+        Returns:
+            List[RenderStage]: 流水线阶段
+        """
+        return [
+            RenderStage(
+                name,
+                func,
+                PerformanceConfig.get_stage_workers(name, max_workers),
+            )
+            for name, func in (
+                ("rasterize", cls.rasterize_stage),
+                ("mask", cls.mask_stage),
+                ("composite", cls.composite_stage),
+                ("encode", cls.encode_stage),
             )
+        ]
 
-            with ThreadPoolExecutor(max_workers=fill_workers) as executor:
-                futures = []
-                for x, y in start_points:
-                    futures.append(
-                        executor.submit(
-                            cv2.floodFill, fill_array, mask.copy(), (x, y), 128
-                        )
-                    )
-                for future in futures:
-                    future.result()
+    @classmethod
+    def render_task(
+        cls, task: RenderTask, context: FillRenderContext
+    ) -> Tuple[Optional[bytes], Tuple[bool, Optional[dict]]]:
+        """渲染单个任务的图标 1.png
 
-            fill_array = np.where((fill_array != 128) & (fill_array != 255), 255, 0)
-            fill_mask = Image.fromarray(fill_array.astype("uint8"))
+        不写入图标文件, 在当前线程依次执行渲染流水线, 供多进程模式使用
 
-        else:
-            # 确保binary_mask是PIL Image
-            if not isinstance(binary_mask, Image.Image):
-                binary_mask = Image.fromarray(binary_mask)
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
 
-            fill_mask = binary_mask.filter(ImageFilter.SMOOTH_MORE).point(
-                lambda x: 255 if x > 128 else 0
-            )
-            for x, y in start_points:
-                ImageDraw.floodfill(fill_mask, (x, y), 128)
+        Returns:
+            Tuple[Optional[bytes], Tuple[bool, Optional[dict]]]:
+                (编码后的PNG字节, 失败时为None; (是否使用了缓存, 新增的缓存记录))
+        """
+        return RenderScheduler.run_inline(cls.render_stages(), task, context) or (
+            None,
+            (False, None),
+        )
 
-        # 应用填充
-        fill_pixels = fill_layer.load()
-        mask_pixels = fill_mask.load()
+    @classmethod
+    def finish_task(
+        cls,
+        task: RenderTask,
+        icon_bytes: Optional[bytes],
+        used_cache: bool,
+        icon_sink: IconZipSink,
+        background_bytes: bytes,
+        total_icons: int,
+    ) -> bool:
+        """分发渲染结果并更新进度
 
-        for y in range(height):
-            for x in range(width):
-                if mask_pixels[x, y] == 255:
-                    fill_pixels[x, y] = fill_color_rgba
+        Args:
+            task: 渲染任务
+            icon_bytes: 编码后的图标 1.png, 渲染失败时为None
+            used_cache: 是否使用了缓存
+            icon_sink: 图标压缩包写入器
+            background_bytes: 编码后的背景 0.png
+            total_icons: 总图标数
 
-        final_icon = Image.alpha_composite(fill_layer, line_icon)
-        final_icon = final_icon.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
-        final_icon.save(icon_dir / "1.png", "PNG")
+        Returns:
+            bool: 处理成功返回True
+        """
+        if icon_bytes is None:
+            return False
 
-        # 总处理时间
-        total_time = time.time() - process_start_time
-        display_time = total_time if used_cache else compute_time
+        RenderPlan.fan_out(task, icon_sink, background_bytes, icon_bytes)
+        if cls.build_manifest is not None:
+            cls.build_manifest.record(task, icon_bytes)
 
-        count = cls.increment_counter()
+        count = cls.increment_counter(len(task.package_names))
         cls.update_progress(
-            count, total_icons, drawable_name, package_name, used_cache, display_time
+            count,
+            total_icons,
+            task.drawable_name,
+            task.display_name,
+            used_cache,
         )
         return True
 
@@ -361,7 +434,7 @@ class FillIconProcessor:
         cls,
         icon_mapper_path: str,
         svg_dir: str,
-        output_dir: str,
+        icon_sink: IconZipSink,
         fill_color: str,
         fg_color: str,
         bg_color: str,
@@ -369,19 +442,21 @@ class FillIconProcessor:
         icon_scale: float,
         supersampling_scale: float,
         max_workers: int,
-        batch_size_cv: int,
-        batch_size_normal: int,
-        array_pool_size: int,
-        fill_workers: int,
         background_cache_size: int,
         enable_cache: bool,
+        executor_mode: str = "thread",
+        process_workers: int = 1,
+        process_chunk_size: int = 16,
+        build_cache_dir: Optional[str] = None,
+        mapper: Optional[Dict[str, str]] = None,
+        plan: Optional[Tuple[List[RenderTask], Dict[str, str]]] = None,
     ) -> None:
         """批量生成填充风格图标
 
         Args:
             icon_mapper_path: 图标映射文件路径
             svg_dir: SVG源文件目录
-            output_dir: 输出目录
+            icon_sink: 图标压缩包写入器
             fill_color: 填充颜色
             fg_color: 前景色
             bg_color: 背景色
@@ -389,81 +464,151 @@ class FillIconProcessor:
             icon_scale: 图标缩放比例
             supersampling_scale: 超采样比例
             max_workers: 最大工作线程数
-            batch_size_cv: OpenCV模式批处理大小
-            batch_size_normal: 普通模式批处理大小
-            array_pool_size: 数组池大小
-            fill_workers: 填充工作线程数
             background_cache_size: 背景缓存大小
             enable_cache: 是否启用填充区域缓存
+            executor_mode: 执行模式, "thread" 多线程 / "process" 多进程
+            process_workers: 多进程模式下的进程数
+            process_chunk_size: 多进程模式下每次提交的任务数
+            build_cache_dir: 增量构建缓存目录, 为None时全部重新渲染
+            mapper: 已解析的 {包名: 图标名} 映射, 为None时解析icon_mapper_path
+            plan: RenderPlan.build 生成的渲染计划, 为None时由mapper生成。
+                批量构建时由调用方生成一次, 各主题共用
         """
         cls.processed_count = 0
         cls._start_time = 0.0
         cls._last_update_time = 0.0
         cls._last_count = 0
-        cls._array_pool_size = array_pool_size
         cls.get_cached_background = functools.lru_cache(maxsize=background_cache_size)(
             cls.get_cached_background_impl
         )
 
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
         svg_dir_path = Path(svg_dir)
-        mapper = OutlineIconProcessor.parse_icon_mapper(icon_mapper_path)
+        if mapper is None:
+            mapper = OutlineIconProcessor.parse_icon_mapper(icon_mapper_path)
 
         print(f"  (2/4) FillIconProcessor.generate_icons: 创建 {bg_color} 背景")
 
         background = cls.get_cached_background(icon_size, bg_color)
-        max_workers = max_workers
         total_icons = len(mapper)
 
-        print(
-            f"  (3/4) FillIconProcessor.generate_icons: 找到 {total_icons} 个图标需要处理, 当前线程数 {max_workers}"
+        # 生成渲染计划, 相同图标只渲染一次
+        if plan is None:
+            plan = RenderPlan.build(mapper, svg_dir_path)
+        tasks, missing = plan
+        for package_name, drawable_name in missing.items():
+            print(
+                f"    (err) FillIconProcessor.generate_icons: 未找到对应svg文件 {drawable_name} ({package_name})"
+            )
+
+        # 背景 0.png 只编码一次
+        background_bytes = RenderPlan.encode_background(
+            background,
+            sum(len(task.package_names) for task in tasks),
+            "FillIconProcessor.generate_icons",
         )
 
-        batch_size = batch_size_cv if USE_CV else batch_size_normal
-        arrays = [cls.get_array((icon_size, icon_size)) for _ in range(batch_size)]
         successful = 0
 
-        # 解压缓存 加载缓存
+        # 增量构建, 输入未变化的图标直接复用
+        cls.build_manifest = None
+        if build_cache_dir:
+            cls.build_manifest = BuildManifest(
+                Path(build_cache_dir) / "filled",
+                {
+                    "style": "filled",
+                    "fg_color": fg_color.lower(),
+                    "fill_color": fill_color.lower(),
+                    "icon_size": icon_size,
+                    "icon_scale": icon_scale,
+                    "supersampling_scale": supersampling_scale,
+                    "supersample_mode": PerformanceConfig.fill_supersample_mode,
+                    "png": RenderPlan.encode_params(),
+                },
+            ).load()
+            reused, tasks, summary = cls.build_manifest.split(tasks)
+            print(
+                f"    FillIconProcessor.generate_icons: 增量构建, 未变化 {summary['unchanged']} 个, 变更 {summary['changed']} 个, 新增 {summary['new']} 个, 移除 {summary['removed']} 个, 复用 {len(reused)} 个渲染结果"
+            )
+            for task, icon_bytes in reused:
+                if cls.finish_task(
+                    task, icon_bytes, True, icon_sink, background_bytes, total_icons
+                ):
+                    successful += len(task.package_names)
+
+        use_process = executor_mode == "process"
+        parallel_desc = (
+            f"当前进程数 {process_workers}"
+            if use_process
+            else f"当前线程数 {max_workers}"
+        )
+        print(
+            f"  (3/4) FillIconProcessor.generate_icons: 找到 {total_icons} 个图标需要处理, 去重后需渲染 {len(tasks)} 个, {parallel_desc}"
+        )
+
+        # 导入旧版缓存 加载缓存
         if enable_cache:
-            MaskCacheManager.extract_cache_archive()
+            MaskCacheManager.import_legacy_archive()
             MaskCacheManager.load_cache_info()
 
-        try:
-            for i in range(0, total_icons, batch_size):
-                batch_items = list(mapper.items())[i : i + batch_size]
-
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    futures = []
-                    for idx, (package_name, drawable_name) in enumerate(batch_items):
-                        futures.append(
-                            executor.submit(
-                                cls.process_single_icon,
-                                package_name,
-                                drawable_name,
-                                svg_dir_path,
-                                output_path,
-                                background,
-                                fg_color,
-                                fill_color,
-                                icon_size,
-                                icon_scale,
-                                supersampling_scale,
-                                total_icons,
-                                arrays[idx],
-                                fill_workers,
-                            )
-                        )
-
-                    for future in futures:
-                        try:
-                            if future.result():
-                                successful += 1
-                        except Exception as e:
-                            print(f"\n    (err) 处理图标时发生错误: {e}")
-        finally:
-            for arr in arrays:
-                cls.release_array(arr)
+        context = FillRenderContext(
+            fg_color,
+            fill_color,
+            icon_size,
+            icon_scale,
+            supersampling_scale,
+            enable_cache,
+            PerformanceConfig.fill_supersample_mode,
+        )
+        if use_process:
+            # 子进程只回传编码后的PNG字节和新增的缓存记录, 由主进程分发写入
+            results = ProcessRenderBackend.run(
+                cls.render_task, context, tasks, process_workers, process_chunk_size
+            )
+            for task, icon_bytes, extra in results:
+                used_cache, mask_record = extra or (False, None)
+                try:
+                    if mask_record:
+                        MaskCacheManager.register_mask(mask_record)
+                    if cls.finish_task(
+                        task,
+                        icon_bytes,
+                        used_cache,
+                        icon_sink,
+                        background_bytes,
+                        total_icons,
+                    ):
+                        successful += len(task.package_names)
+                except Exception as e:
+                    print(f"\n    (err) 处理图标时发生错误: {e}")
+        else:
+            # 多线程流水线: 栅格化 -> 蒙版 -> 合成 -> 编码 -> 写入
+            # 共用常驻的渲染调度器, 缓存记录已在蒙版阶段登记
+            write_stage = functools.partial(
+                cls.write_stage,
+                icon_sink=icon_sink,
+                background_bytes=background_bytes,
+                total_icons=total_icons,
+            )
+            stages = cls.render_stages(max_workers) + [
+                RenderStage(
+                    "write",
+                    write_stage,
+                    PerformanceConfig.get_stage_workers("write", max_workers),
+                )
+            ]
+            results = RenderScheduler.shared(PerformanceConfig.render_queue_size).run(
+                stages,
+                context,
+                tasks,
+                (
+                    "FillIconProcessor.generate_icons"
+                    if PerformanceConfig.enable_pipeline_stats
+                    else None
+                ),
+            )
+            for task, written in results:
+                if written:
+                    successful += len(task.package_names)
 
         print(
             f"  (4/4) FillIconProcessor.generate_icons: 图标处理完成, 成功处理 {successful}/{total_icons}"
@@ -472,4 +617,8 @@ class FillIconProcessor:
         # 保存缓存
         if enable_cache:
             MaskCacheManager.save_cache_info()
-            MaskCacheManager.pack_cache_files()
+            MaskCacheManager.flush_store()
+
+        # 保存增量构建清单
+        if cls.build_manifest is not None:
+            cls.build_manifest.save()
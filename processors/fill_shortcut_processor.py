@@ -1,8 +1,10 @@
 import shutil
+import numpy as np
 
-from PIL import Image, ImageColor, ImageFilter, ImageDraw
+from PIL import Image, ImageFilter, ImageDraw
 from pathlib import Path
 
+from processors.fill_compositor import FillCompositor
 from processors.outline_icon_processor import OutlineIconProcessor
 
 
@@ -69,10 +71,6 @@ class FillShortcutProcessor:
             print("    (err) 处理锁屏图标失败")
             return
 
-        # 超采样填充层
-        fill_layer = Image.new("RGBA", line_icon.size, (0, 0, 0, 0))
-        fill_color_rgba = ImageColor.getrgb(fill_color)
-
         # 图像处理
         smoothed = line_icon.filter(ImageFilter.GaussianBlur(0.8))
         binary_mask = smoothed.convert("L").point(lambda x: 255 if x > 20 else 0)
@@ -97,16 +95,10 @@ class FillShortcutProcessor:
         for x, y in start_points:
             ImageDraw.floodfill(fill_mask, (x, y), 128)
 
-        # 创建填充图层
-        fill_pixels = fill_layer.load()
-        mask_pixels = fill_mask.load()
-        for y in range(height):
-            for x in range(width):
-                if mask_pixels[x, y] != 128:
-                    fill_pixels[x, y] = fill_color_rgba
-
-        # 合并图层
-        final_icon = Image.alpha_composite(fill_layer, line_icon)
+        # 创建填充图层并合并
+        final_icon = FillCompositor.composite(
+            line_icon, np.asarray(fill_mask) != 128, fill_color
+        )
 
         # 缩小到目标尺寸
         final_icon = final_icon.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
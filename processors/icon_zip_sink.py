@@ -0,0 +1,113 @@
+import os
+import queue
+import zipfile
+import threading
+
+from pathlib import Path
+from typing import Optional
+
+
+class IconZipSink:
+    """图标压缩包写入器
+
+    渲染线程/进程只提交编码后的PNG字节, 由单个写入线程顺序追加到 ZIP_STORED 压缩包:
+    1. 不再写出 output/<包名>/ 临时目录
+    2. 不再需要移动目录和二次遍历目录
+    3. 队列有界, 写入跟不上时阻塞提交方, 内存占用可控
+    """
+
+    # 图标在压缩包中的目录
+    DRAWABLE_DIR = "res/drawable-xxhdpi"
+
+    def __init__(self, zip_path: Path, queue_size: int = 256):
+        """
+        Args:
+            zip_path: 压缩包路径
+            queue_size: 待写入队列长度
+        """
+        self.zip_path = Path(zip_path)
+        self.written_count = 0
+        self.written_bytes = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(queue_size)
+        self._zip_file: Optional[zipfile.ZipFile] = None
+        self._writer: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def open(self) -> "IconZipSink":
+        """创建压缩包并启动写入线程
+
+        Returns:
+            IconZipSink: self
+        """
+        self.zip_path.parent.mkdir(parents=True, exist_ok=True)
+        self._zip_file = zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_STORED)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="IconZipSink", daemon=True
+        )
+        self._writer.start()
+        return self
+
+    def write(self, arcname: str, data: bytes) -> None:
+        """提交一个文件
+
+        Args:
+            arcname: 压缩包内路径
+            data: 文件内容
+        """
+        if self._error is not None:
+            raise RuntimeError(f"写入 {self.zip_path} 失败: {self._error}")
+        self._queue.put((arcname, data))
+
+    def write_icon(self, package_name: str, filename: str, data: bytes) -> None:
+        """提交一个图标文件
+
+        Args:
+            package_name: 包名
+            filename: 文件名, 0.png 或 1.png
+            data: PNG字节
+        """
+        self.write(f"{self.DRAWABLE_DIR}/{package_name}/{filename}", data)
+
+    def write_tree(self, root_dir: Path) -> None:
+        """提交目录下的所有非空文件, 压缩包自身除外
+
+        Args:
+            root_dir: 目录
+        """
+        for root, dirs, files in os.walk(root_dir):
+            for file in files:
+                file_path = Path(root) / file
+                if file_path.resolve() == self.zip_path.resolve():
+                    continue
+                if file_path.stat().st_size > 0:  # 只添加非空文件
+                    arcname = file_path.relative_to(root_dir).as_posix()
+                    self.write(arcname, file_path.read_bytes())
+
+    def close(self) -> None:
+        """等待队列写完并关闭压缩包"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._zip_file is not None:
+            self._zip_file.close()
+            self._zip_file = None
+        if self._error is not None:
+            raise RuntimeError(f"写入 {self.zip_path} 失败: {self._error}")
+
+    def _write_loop(self) -> None:
+        """写入线程, 按提交顺序追加文件"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+
+            arcname, data = item
+            try:
+                self._zip_file.writestr(arcname, data)
+                self.written_count += 1
+                self.written_bytes += len(data)
+            except BaseException as e:
+                self._error = e
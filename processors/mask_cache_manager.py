@@ -1,46 +1,75 @@
 import lz4.frame
+import threading
 import tarfile
 import numpy as np
 import hashlib
-import yaml
 
-from typing import Optional
+from typing import Optional, Sequence, Tuple
 from datetime import datetime
 from pathlib import Path
 from PIL import Image
 from configs.config import PerformanceConfig
+from processors.mask_store import MaskStore
+from processors.mask_info_store import MaskInfoStore
 
 
 class MaskCacheManager:
     """填充蒙版预计算缓存管理器
     
     管理图标填充区域的二值化mask缓存
-    缓存元数据列表yml存储, 二值化mask数据lz4压缩存储, 均位于current_dir。
+    缓存元数据存于SQLite(MaskInfoStore), 二值化mask数据存于单文件蒙版存储(MaskStore), 均位于current_dir。
+    缓存键由SVG内容哈希和所有影响mask的参数生成, 旧版按文件名索引的缓存在首次命中时迁移。
     """
 
-    # 缓存元数据
-    _cache_info = {
-        "metadata": {
-            "version": "1.0.0",  # 缓存版本号
-            "created_at": "",  # 首次创建时间
-            "updated_at": "",  # 最后更新时间
-            "total_masks": 0,  # 总缓存数量
-            "total_size": 0,  # 总缓存大小(bytes)
-            "supersampling_scale": float(PerformanceConfig.supersampling_scale),
-        },
-        "masks": {},
-    }
+    # 缓存格式版本号
+    CACHE_VERSION = "2.0.0"
+
+    # 蒙版算法版本号, 修改模糊/阈值/闭运算参数时需递增, 使旧缓存失效
+    MASK_ALGORITHM_VERSION = 2
+
+    # 旧版缓存 (按文件名索引) 生成时使用的图标缩放比例和前景色
+    LEGACY_ICON_SCALE = 0.4
+    LEGACY_FG_COLOR = (0xD1, 0xE2, 0xFC)
+
+    # 蒙版存储, 首次使用时打开
+    _store: Optional[MaskStore] = None
+    _store_lock = threading.Lock()
+
+    # 缓存元数据存储, 由load_cache_info打开
+    _info_store: Optional[MaskInfoStore] = None
 
     @classmethod
-    def get_cache_path(cls, svg_path: str, size: int) -> Path:
-        """根据SVG路径和尺寸生成缓存文件路径
+    def get_cache_key(
+        cls, content_hash: str, size: int, icon_scale: float, fg_rgb: Sequence[int]
+    ) -> str:
+        """根据SVG内容哈希和所有影响mask的参数生成缓存键
+
+        Args:
+            content_hash: SVG文件内容哈希
+            size: 图标尺寸(超采样后)
+            icon_scale: 图标缩放比例
+            fg_rgb: 前景色 (R, G, B), 二值化阈值作用于着色后的灰度图
+
+        Returns:
+            str: 缓存键, 格式为"{hash}_s{size}_sc{scale}_ss{ss}_c{rrggbb}_v{version}"
+        """
+        r, g, b = (int(c) for c in fg_rgb)
+        return (
+            f"{content_hash}_s{size}_sc{icon_scale:.3f}"
+            f"_ss{PerformanceConfig.supersampling_scale:.2f}"
+            f"_c{r:02x}{g:02x}{b:02x}_v{cls.MASK_ALGORITHM_VERSION}"
+        )
+
+    @classmethod
+    def get_legacy_cache_key(cls, svg_path: str, size: int) -> str:
+        """旧版缓存键, 仅按SVG文件名和尺寸索引, 用于迁移
 
         Args:
             svg_path: SVG文件路径
             size: 图标尺寸(超采样后)
 
         Returns:
-            Path: 缓存文件路径, 格式为"{svg_name}_s{size}_ss{scale}.npmask"
+            str: 缓存键, 格式为"{svg_name}_s{size}_ss{scale}"
         """
         svg_name = Path(svg_path).stem
 
@@ -52,52 +81,96 @@ class MaskCacheManager:
             path_hash = hashlib.md5(str(Path(svg_path).parent).encode()).hexdigest()[:8]
             filename = f"{svg_name[:50]}_{path_hash}_s{size}_ss{PerformanceConfig.supersampling_scale:.1f}"
 
-        filename = "".join(c for c in filename if c.isalnum() or c in "._-")
+        return "".join(c for c in filename if c.isalnum() or c in "._-")
+
+    @classmethod
+    def migrate_legacy_mask(
+        cls,
+        svg_path: str,
+        size: int,
+        icon_scale: float,
+        fg_rgb: Sequence[int],
+        cache_key: str,
+    ) -> Tuple[Optional[np.ndarray], Optional[dict]]:
+        """将旧版缓存迁移到内容寻址的缓存键下
+
+        旧版缓存键不含SVG内容、图标缩放比例和前景色, 迁移时将其绑定到当前SVG内容,
+        此后SVG被修改即不再命中。缩放比例或前景色与旧版不一致时不迁移。
+
+        Args:
+            svg_path: SVG文件路径
+            size: 图标尺寸(超采样后)
+            icon_scale: 图标缩放比例
+            fg_rgb: 前景色 (R, G, B)
+            cache_key: 新的缓存键
+
+        Returns:
+            Tuple[Optional[np.ndarray], Optional[dict]]: (迁移后的mask, 新增的缓存记录)
+        """
+        if abs(icon_scale - cls.LEGACY_ICON_SCALE) > 1e-6:
+            return None, None
+        if tuple(int(c) for c in fg_rgb) != cls.LEGACY_FG_COLOR:
+            return None, None
 
-        return PerformanceConfig.fill_mask_cache_dir / f"{filename}.npmask"
+        legacy_key = cls.get_legacy_cache_key(svg_path, size)
+        mask = cls.load_mask(legacy_key)
+        if mask is None:
+            return None, None
+
+        mask_record = cls.save_mask(mask, cache_key, migrated_from=legacy_key)
+        return mask, mask_record
 
     @classmethod
-    def load_mask(cls, cache_path: Path) -> Optional[np.ndarray]:
-        """从缓存文件加载mask数据
+    def get_store(cls) -> MaskStore:
+        """获取蒙版存储, 首次调用时打开
+
+        Returns:
+            MaskStore: 蒙版存储
+        """
+        if cls._store is None:
+            with cls._store_lock:
+                if cls._store is None:
+                    cls._store = MaskStore(
+                        PerformanceConfig.fill_mask_store,
+                        PerformanceConfig.fill_mask_store_index,
+                        PerformanceConfig.fill_mask_lru_size,
+                    ).open()
+        return cls._store
+
+    @classmethod
+    def load_mask(cls, cache_key: str) -> Optional[np.ndarray]:
+        """从蒙版存储加载mask数据
 
         Args:
-            cache_path: 缓存文件路径
+            cache_key: 缓存键
 
         Returns:
             np.ndarray | None: 成功返回numpy数组形式的mask, 失败返回None
         """
-        if not cache_path.exists():
-            return None
         try:
-            with open(cache_path, "rb") as f:
-                compressed_data = f.read()
-                mask_bytes = lz4.frame.decompress(compressed_data)
-                mask = np.frombuffer(mask_bytes, dtype=np.uint8)
-                size = int(np.sqrt(len(mask)))
-
-                if size * size != len(mask):
-                    print(f"    (warn) 缓存mask尺寸不匹配: {cache_path}")
-                    return None
-
-                try:
-                    return mask.reshape(size, size)
-                except ValueError as e:
-                    print(f"    (warn) 重塑mask数组失败: {e}")
-                    return None
-
+            return cls.get_store().get(cache_key)
         except Exception as e:
-            print(f"    (err) 读取缓存失败 {cache_path}: {e}")
+            print(f"    (err) 读取缓存失败 {cache_key}: {e}")
             return None
 
     @classmethod
-    def save_mask(cls, mask: np.ndarray, cache_path: Path):
-        """保存mask数据到缓存文件
+    def save_mask(
+        cls, mask: np.ndarray, cache_key: str, migrated_from: str = ""
+    ) -> Optional[dict]:
+        """保存mask数据到蒙版存储
 
         Args:
             mask: 要缓存的mask数组
-            cache_path: 缓存文件路径
-        
+            cache_key: 缓存键
+            migrated_from: 迁移来源的旧版缓存键, 可选
+
         保存的同时会更新cache_info中的元数据和具体mask信息
+
+        Returns:
+            dict | None: 新增的缓存记录, 失败返回None
+                key: 缓存键
+                info: mask信息
+                payload: 编码后的mask数据, 供多进程模式下主进程写入蒙版存储
         """
         try:
             if isinstance(mask, Image.Image):
@@ -106,19 +179,10 @@ class MaskCacheManager:
             if len(mask.shape) > 2:
                 mask = mask[:, :, 0]
 
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            mask_bytes = mask.tobytes()
-            compressed_data = lz4.frame.compress(mask_bytes)
-
-            with open(cache_path, "wb") as f:
-                f.write(compressed_data)
-
-            relative_path = cache_path.relative_to(
-                PerformanceConfig.fill_mask_cache_dir
-            )
+            compressed_data = MaskStore.encode(mask, PerformanceConfig.fill_mask_codec)
 
-            # 更新具体mask信息
-            cls._cache_info["masks"][str(relative_path)] = {
+            # 具体mask信息
+            mask_info = {
                 "created_at": datetime.now().isoformat(),
                 "file_size": len(compressed_data),
                 "original_size": mask.nbytes,
@@ -127,177 +191,154 @@ class MaskCacheManager:
                 "dtype": str(mask.dtype),
                 "hash": hashlib.md5(compressed_data).hexdigest(),
             }
+            if migrated_from:
+                mask_info["migrated_from"] = migrated_from
 
-            # 更新元数据
-            cls._cache_info["metadata"].update(
-                {
-                    "updated_at": datetime.now().isoformat(),
-                    "total_masks": len(cls._cache_info["masks"]),
-                    "total_size": sum(
-                        m["file_size"] for m in cls._cache_info["masks"].values()
-                    ),
-                    "supersampling_scale": float(PerformanceConfig.supersampling_scale),
-                }
-            )
+            mask_record = {
+                "key": cache_key,
+                "info": mask_info,
+                "payload": compressed_data,
+            }
+            cls.register_mask(mask_record)
+            return mask_record
 
         except Exception as e:
             print(f"    (err) 保存缓存失败: {e}")
+            return None
+
+    @classmethod
+    def register_mask(cls, mask_record: dict):
+        """登记缓存记录, 写入蒙版存储并更新元数据
+
+        多进程模式下, 子进程保存的缓存记录需在主进程中重新登记
+        由旧版缓存迁移而来的记录会同时移除对应的旧版缓存
+
+        Args:
+            mask_record: 缓存记录, 由save_mask生成
+        """
+        cache_key = mask_record["key"]
+        mask_info = mask_record["info"]
+        store = cls.get_store()
+        store.put_payload(cache_key, mask_record["payload"], *mask_info["shape"])
+
+        # 移除已迁移的旧版缓存
+        legacy_key = mask_info.get("migrated_from")
+        if legacy_key:
+            store.remove(legacy_key)
+
+        # 子进程中没有元数据存储, 由主进程登记
+        info_store = cls._info_store
+        if info_store is None or not info_store.is_owner:
+            return
+
+        info_store.put(cache_key, mask_info)
+        if legacy_key:
+            info_store.remove(legacy_key)
 
     @classmethod
     def load_cache_info(cls):
-        """加载缓存信息文件
+        """打开缓存信息数据库
 
-        从YAML文件加载缓存元数据和具体mask信息
-        如果文件不存在则初始化新的缓存信息
+        首次运行时从旧版YAML文件导入缓存元数据和具体mask信息
         """
         try:
-            if PerformanceConfig.fill_mask_cache_info.exists():
-                with open(
-                    PerformanceConfig.fill_mask_cache_info, "r", encoding="utf-8"
-                ) as f:
-                    cls._cache_info = yaml.safe_load(f) or {}
-                    # 确保metadata存在并包含所有必要字段
-                    if "metadata" not in cls._cache_info:
-                        cls._cache_info["metadata"] = {}
-
-                    # 更新或初始化metadata
-                    cls._cache_info["metadata"].update(
-                        {
-                            "version": cls._cache_info["metadata"].get(
-                                "version", "1.0.0"
-                            ),
-                            "created_at": cls._cache_info["metadata"].get(
-                                "created_at", datetime.now().isoformat()
-                            ),
-                            "updated_at": datetime.now().isoformat(),
-                            "total_masks": len(cls._cache_info.get("masks", {})),
-                            "total_size": sum(
-                                m.get("file_size", 0)
-                                for m in cls._cache_info.get("masks", {}).values()
-                            ),
-                            "supersampling_scale": float(
-                                PerformanceConfig.supersampling_scale
-                            ),
-                        }
-                    )
-
-                    if "masks" not in cls._cache_info:
-                        cls._cache_info["masks"] = {}
-            else:
-                # 初始化新的缓存信息
-                cls._cache_info = {
-                    "metadata": {
-                        "version": "1.0.0",
-                        "created_at": datetime.now().isoformat(),
-                        "updated_at": datetime.now().isoformat(),
-                        "total_masks": 0,
-                        "total_size": 0,
-                        "supersampling_scale": float(
-                            PerformanceConfig.supersampling_scale
-                        ),
-                    },
-                    "masks": {},
-                }
+            cls._info_store = MaskInfoStore(
+                PerformanceConfig.fill_mask_cache_info
+            ).open()
+
+            legacy_info = PerformanceConfig.fill_mask_cache_info_legacy
+            if len(cls._info_store) == 0 and legacy_info.exists():
+                print(
+                    f"    (cache) MaskCacheManager.load_cache_info: 正在导入旧版缓存信息 {legacy_info.name}"
+                )
+                imported = cls._info_store.import_yaml(legacy_info)
+                print(
+                    f"    (cache) MaskCacheManager.load_cache_info: 已导入 {imported} 条缓存信息"
+                )
+
+            metadata = cls._info_store.get_metadata()
+            cls._info_store.set_metadata(
+                version=cls.CACHE_VERSION,
+                created_at=metadata.get("created_at", datetime.now().isoformat()),
+                supersampling_scale=float(PerformanceConfig.supersampling_scale),
+            )
+
+            # 先提交导入结果, 子进程启动时不持有未提交的事务
+            cls._info_store.commit()
         except Exception as e:
             print(f"    (err) 读取缓存信息失败: {e}")
-            cls._cache_info = {
-                "metadata": {
-                    "version": "1.0.0",
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                    "total_masks": 0,
-                    "total_size": 0,
-                    "supersampling_scale": float(PerformanceConfig.supersampling_scale),
-                },
-                "masks": {},
-            }
+            cls._info_store = None
 
     @classmethod
     def save_cache_info(cls):
-        """保存缓存信息到YAML文件
+        """提交缓存信息数据库
 
-        将当前的缓存元数据和具体mask信息保存到文件
+        只写入本次构建新增或删除的记录, 并更新统计信息
         """
         try:
-            PerformanceConfig.fill_mask_cache_info.parent.mkdir(
-                parents=True, exist_ok=True
-            )
-            with open(
-                PerformanceConfig.fill_mask_cache_info, "w", encoding="utf-8"
-            ) as f:
-                yaml.dump(
-                    cls._cache_info, f, allow_unicode=True, sort_keys=False, indent=2
-                )
+            if cls._info_store is None:
+                return
+            cls._info_store.commit()
+            cls._info_store.close()
+            cls._info_store = None
         except Exception as e:
             print(f"    (err) 保存缓存信息失败: {e}")
 
     @classmethod
-    def pack_cache_files(cls):
-        """打包所有缓存文件
+    def flush_store(cls):
+        """将新增的缓存写入蒙版存储文件
 
-        将.npmask文件打包并用lz4压缩, 生成cached_masks.tar.lz4
+        写入cached_masks.bin并重写索引cached_masks.idx
         """
         try:
-            if not PerformanceConfig.fill_mask_cache_dir.exists():
+            if cls._store is None:
                 return
 
+            cls._store.flush()
             print(
-                "    (cache) MaskCacheManager.pack_cache_files: 正在打包填充蒙版预计算缓存..."
-            )
-            temp_tar = PerformanceConfig.fill_mask_cache_archive.with_suffix(".tar")
-
-            with tarfile.open(temp_tar, "w") as tar:
-                for mask_file in PerformanceConfig.fill_mask_cache_dir.glob("*.npmask"):
-                    tar.add(
-                        mask_file,
-                        arcname=str(
-                            mask_file.relative_to(PerformanceConfig.fill_mask_cache_dir)
-                        ),
-                    )
-
-            with open(temp_tar, "rb") as f_in:
-                with lz4.frame.open(
-                    PerformanceConfig.fill_mask_cache_archive, "wb"
-                ) as f_out:
-                    f_out.write(f_in.read())
-
-            temp_tar.unlink()
-            print(
-                f"    (cache) MaskCacheManager.pack_cache_files: 填充蒙版预计算缓存已打包至: {PerformanceConfig.fill_mask_cache_archive}"
+                f"    (cache) MaskCacheManager.flush_store: 填充蒙版预计算缓存已写入: {PerformanceConfig.fill_mask_store} ({len(cls._store)}个)"
             )
 
         except Exception as e:
-            print(f"    (err) 打包缓存文件失败: {e}")
+            print(f"    (err) 写入缓存文件失败: {e}")
 
     @classmethod
-    def extract_cache_archive(cls):
-        """解压缓存文件
+    def import_legacy_archive(cls):
+        """导入旧版缓存归档
 
-        解压cached_masks.tar.lz4到临时缓存目录
+        随仓库分发的缓存为蒙版存储文件cached_masks.bin/.idx, 构建时原地映射、按需读取单个mask。
+        旧版cached_masks.tar.lz4为流式压缩的tar, 无法随机读取, 仅作为一次性的迁移输入:
+        流式读取其中的.npmask逐个写入蒙版存储, 不解包到文件系统, 导入完成后删除旧版归档。
         """
         try:
             if not PerformanceConfig.fill_mask_cache_archive.exists():
                 return
 
             print(
-                "    (cache) MaskCacheManager.extract_cache_archive: 正在解压填充蒙版预计算缓存 cached_masks.tar.lz4"
+                "    (cache) MaskCacheManager.import_legacy_archive: 正在导入旧版填充蒙版预计算缓存 cached_masks.tar.lz4"
             )
-            PerformanceConfig.fill_mask_cache_dir.mkdir(parents=True, exist_ok=True)
-            temp_tar = PerformanceConfig.fill_mask_cache_archive.with_suffix(".tar")
+            store = cls.get_store()
+            imported = 0
 
             with lz4.frame.open(
                 PerformanceConfig.fill_mask_cache_archive, "rb"
             ) as f_in:
-                with open(temp_tar, "wb") as f_out:
-                    f_out.write(f_in.read())
-
-            with tarfile.open(temp_tar, "r") as tar:
-                tar.extractall(PerformanceConfig.fill_mask_cache_dir)
-
-            temp_tar.unlink()
+                with tarfile.open(fileobj=f_in, mode="r|") as tar:
+                    for member in tar:
+                        if not member.isfile() or not member.name.endswith(".npmask"):
+                            continue
+
+                        # 旧版为原始字节lz4压缩, 导入时按当前编码方式重新编码
+                        mask = MaskStore.decode(tar.extractfile(member).read())
+                        key = Path(member.name).name.removesuffix(".npmask")
+                        store.put(key, mask, PerformanceConfig.fill_mask_codec)
+                        imported += 1
+
+            store.flush()
+            PerformanceConfig.fill_mask_cache_archive.unlink()
             print(
-                "    (cache) MaskCacheManager.extract_cache_archive: 填充蒙版预计算缓存解压完成"
+                f"    (cache) MaskCacheManager.import_legacy_archive: 已导入 {imported} 个旧版缓存"
             )
 
         except Exception as e:
-            print(f"    (err) 解压缓存文件失败: {e}")
+            print(f"    (err) 导入旧版缓存失败: {e}")
@@ -0,0 +1,142 @@
+import struct
+import lz4.frame
+import numpy as np
+
+from typing import Optional
+
+
+class MaskCodec:
+    """二值蒙版编解码器
+
+    填充蒙版只包含0和255两种值, 按位打包后体积为原始字节的1/8:
+    1. BITS: np.packbits按位打包后lz4压缩
+    2. RLE: 按行优先展开后记录游程长度, lz4压缩
+    3. RAW: 原始字节lz4压缩, 用于非二值数据
+    编码结果带版本化的格式头, 无格式头的数据视为旧版RAW格式
+    """
+
+    MAGIC = b"HMSK"
+    VERSION = 1
+    _HEADER = struct.Struct("<4sBBHH")  # magic, version, codec, height, width
+
+    CODEC_RAW = 0
+    CODEC_BITS = 1
+    CODEC_RLE = 2
+
+    # 编码方式: "auto" 取BITS与RLE中较小者, 也可指定 "bits"/"rle"/"raw"
+    MODES = {
+        "raw": CODEC_RAW,
+        "bits": CODEC_BITS,
+        "rle": CODEC_RLE,
+    }
+
+    @classmethod
+    def encode(cls, mask: np.ndarray, mode: str = "auto") -> bytes:
+        """编码mask
+
+        Args:
+            mask: 二维uint8数组
+            mode: 编码方式, "auto"/"bits"/"rle"/"raw"
+
+        Returns:
+            bytes: 带格式头的编码数据
+        """
+        mask = np.ascontiguousarray(mask, np.uint8)
+        height, width = mask.shape[:2]
+
+        # 非二值数据只能使用RAW
+        if mode != "raw" and not cls.is_binary(mask):
+            mode = "raw"
+
+        if mode == "auto":
+            candidates = [
+                cls._pack(cls.CODEC_BITS, cls._encode_bits(mask), height, width),
+                cls._pack(cls.CODEC_RLE, cls._encode_rle(mask), height, width),
+            ]
+            return min(candidates, key=len)
+
+        codec = cls.MODES[mode]
+        if codec == cls.CODEC_BITS:
+            body = cls._encode_bits(mask)
+        elif codec == cls.CODEC_RLE:
+            body = cls._encode_rle(mask)
+        else:
+            body = mask.tobytes()
+        return cls._pack(codec, body, height, width)
+
+    @classmethod
+    def decode(
+        cls, payload: bytes, height: Optional[int] = None, width: Optional[int] = None
+    ) -> np.ndarray:
+        """解码mask
+
+        Args:
+            payload: 编码数据
+            height: mask高度, 仅旧版无格式头数据需要, 缺省时按正方形推断
+            width: mask宽度, 仅旧版无格式头数据需要
+
+        Returns:
+            np.ndarray: 二维uint8数组
+        """
+        payload = bytes(payload)
+        if payload[:4] != cls.MAGIC:
+            # 旧版格式: 原始字节直接lz4压缩
+            data = np.frombuffer(lz4.frame.decompress(payload), dtype=np.uint8)
+            if height is None or width is None:
+                height = width = int(np.sqrt(len(data)))
+            return data.reshape(height, width)
+
+        magic, version, codec, height, width = cls._HEADER.unpack_from(payload, 0)
+        if version != cls.VERSION:
+            raise ValueError(f"不支持的蒙版格式版本: {version}")
+
+        body = lz4.frame.decompress(payload[cls._HEADER.size :])
+        if codec == cls.CODEC_BITS:
+            return cls._decode_bits(body, height, width)
+        if codec == cls.CODEC_RLE:
+            return cls._decode_rle(body, height, width)
+        if codec == cls.CODEC_RAW:
+            return np.frombuffer(body, dtype=np.uint8).reshape(height, width)
+        raise ValueError(f"不支持的蒙版编码方式: {codec}")
+
+    @staticmethod
+    def is_binary(mask: np.ndarray) -> bool:
+        """是否只包含0和255"""
+        return bool(((mask == 0) | (mask == 255)).all())
+
+    @classmethod
+    def _pack(cls, codec: int, body: bytes, height: int, width: int) -> bytes:
+        """拼接格式头并压缩数据体"""
+        header = cls._HEADER.pack(cls.MAGIC, cls.VERSION, codec, height, width)
+        return header + lz4.frame.compress(body)
+
+    @staticmethod
+    def _encode_bits(mask: np.ndarray) -> bytes:
+        """按位打包"""
+        return np.packbits(mask.ravel() != 0).tobytes()
+
+    @staticmethod
+    def _decode_bits(body: bytes, height: int, width: int) -> np.ndarray:
+        """按位解包"""
+        bits = np.unpackbits(np.frombuffer(body, dtype=np.uint8), count=height * width)
+        return (bits * np.uint8(255)).reshape(height, width)
+
+    @staticmethod
+    def _encode_rle(mask: np.ndarray) -> bytes:
+        """游程编码
+
+        数据体为首个像素值(1字节) + 各游程长度(uint32)
+        """
+        flat = mask.ravel() != 0
+        changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [flat.size]))
+        runs = np.diff(bounds).astype("<u4")
+        return bytes([int(flat[0])]) + runs.tobytes()
+
+    @staticmethod
+    def _decode_rle(body: bytes, height: int, width: int) -> np.ndarray:
+        """游程解码"""
+        first = body[0]
+        runs = np.frombuffer(body, dtype="<u4", offset=1)
+        values = ((np.arange(runs.size) + first) & 1).astype(np.uint8) * np.uint8(255)
+        return np.repeat(values, runs).reshape(height, width)
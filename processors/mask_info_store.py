@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+import yaml
+
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class MaskInfoStore:
+    """蒙版缓存元数据存储
+
+    以SQLite保存每个mask的信息与全局元数据, 替代整体读写的YAML文件:
+    1. 按缓存键建立主键索引, 单条写入为O(1)
+    2. 所有写入经同一把锁串行化, 多线程安全
+    3. 只写入变更的记录, 构建结束时统一提交事务
+    4. 连接只属于打开它的进程, 子进程中的写入会被忽略
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS masks (
+            key TEXT PRIMARY KEY,
+            created_at TEXT,
+            file_size INTEGER,
+            original_size INTEGER,
+            compression_ratio TEXT,
+            height INTEGER,
+            width INTEGER,
+            dtype TEXT,
+            hash TEXT,
+            migrated_from TEXT
+        );
+        CREATE TABLE IF NOT EXISTS metadata (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    _COLUMNS = (
+        "key",
+        "created_at",
+        "file_size",
+        "original_size",
+        "compression_ratio",
+        "height",
+        "width",
+        "dtype",
+        "hash",
+        "migrated_from",
+    )
+
+    def __init__(self, db_path: Path):
+        """
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._owner_pid = 0
+
+    def open(self) -> "MaskInfoStore":
+        """打开数据库, 不存在时创建
+
+        Returns:
+            MaskInfoStore: self
+        """
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self._SCHEMA)
+        self._owner_pid = os.getpid()
+        return self
+
+    def close(self) -> None:
+        """提交未保存的变更并关闭数据库"""
+        with self._lock:
+            if self._conn is not None and self.is_owner:
+                self._conn.commit()
+                self._conn.close()
+            self._conn = None
+
+    @property
+    def is_owner(self) -> bool:
+        """当前进程是否为打开数据库的进程"""
+        return self._conn is not None and self._owner_pid == os.getpid()
+
+    def __len__(self) -> int:
+        return self.stats()[0]
+
+    def put(self, key: str, info: Dict) -> None:
+        """写入一条mask信息
+
+        Args:
+            key: 缓存键
+            info: mask信息, 字段同 MaskCacheManager.save_mask
+        """
+        height, width = info.get("shape") or (None, None)
+        row = (
+            key,
+            info.get("created_at"),
+            info.get("file_size"),
+            info.get("original_size"),
+            info.get("compression_ratio"),
+            height,
+            width,
+            info.get("dtype"),
+            info.get("hash"),
+            info.get("migrated_from"),
+        )
+        with self._lock:
+            if not self.is_owner:
+                return
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO masks VALUES ({', '.join('?' * len(row))})",
+                row,
+            )
+
+    def remove(self, key: str) -> None:
+        """删除一条mask信息
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            if not self.is_owner:
+                return
+            self._conn.execute("DELETE FROM masks WHERE key = ?", (key,))
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取一条mask信息
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Dict | None: mask信息, 不存在返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM masks WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        info = dict(zip(self._COLUMNS, row))
+        info["shape"] = [info.pop("height"), info.pop("width")]
+        info.pop("key")
+        if info["migrated_from"] is None:
+            info.pop("migrated_from")
+        return info
+
+    def stats(self) -> Tuple[int, int]:
+        """统计缓存数量与总大小
+
+        Returns:
+            Tuple[int, int]: (总缓存数量, 总缓存大小bytes)
+        """
+        with self._lock:
+            count, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM masks"
+            ).fetchone()
+        return count, total_size
+
+    def get_metadata(self) -> Dict[str, str]:
+        """读取全局元数据"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, value FROM metadata"))
+
+    def set_metadata(self, **values) -> None:
+        """写入全局元数据"""
+        with self._lock:
+            if not self.is_owner:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+                [(name, str(value)) for name, value in values.items()],
+            )
+
+    def commit(self) -> None:
+        """更新统计信息并提交事务"""
+        if not self.is_owner:
+            return
+
+        total_masks, total_size = self.stats()
+        self.set_metadata(
+            updated_at=datetime.now().isoformat(),
+            total_masks=total_masks,
+            total_size=total_size,
+        )
+        with self._lock:
+            self._conn.commit()
+
+    def import_yaml(self, yaml_path: Path) -> int:
+        """从旧版YAML缓存信息文件导入
+
+        Args:
+            yaml_path: YAML文件路径
+
+        Returns:
+            int: 导入的mask信息数量
+        """
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        with open(yaml_path, "r", encoding="utf-8") as f:
+            cache_info = yaml.load(f, Loader=loader) or {}
+
+        masks = cache_info.get("masks") or {}
+        for key, info in masks.items():
+            # 旧版以.npmask文件名为键, 统一为缓存键
+            self.put(key.removesuffix(".npmask"), info)
+
+        created_at = (cache_info.get("metadata") or {}).get("created_at")
+        if created_at:
+            self.set_metadata(created_at=created_at)
+        return len(masks)
@@ -0,0 +1,403 @@
+import os
+import mmap
+import struct
+import threading
+import numpy as np
+
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from processors.mask_codec import MaskCodec
+
+
+class MaskStore:
+    """单文件蒙版存储
+
+    以一个数据文件加一个偏移索引存储所有mask, 替代数千个独立的.npmask文件:
+    1. 数据文件只追加写入, 通过mmap只读映射
+    2. 索引按键排序, 同样通过mmap映射, 查找时二分, 打开耗时与缓存数量无关
+    3. 读取即切片加解码, 无需解包到文件系统
+    4. 最近解码的mask保存在内存LRU中
+    5. 新写入的mask先暂存于内存, flush时统一追加
+    """
+
+    INDEX_MAGIC = b"HMIX"
+    INDEX_VERSION = 2
+    _HEADER = struct.Struct("<4sHIQ")  # magic, version, count, live_bytes
+    _RECORD = struct.Struct("<IHQIHH")  # key_offset, key_len, offset, length, h, w
+
+    # 失效数据占比超过该值时, flush会重写数据文件
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, data_path: Path, index_path: Path, cache_size: int = 0):
+        """
+        Args:
+            data_path: 数据文件路径
+            index_path: 索引文件路径
+            cache_size: 内存中保留的已解码mask数量, 0表示不缓存
+        """
+        self.data_path = Path(data_path)
+        self.index_path = Path(index_path)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+
+        # 磁盘索引
+        self._index_file = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._index_count = 0
+
+        # 尚未写入磁盘索引的变更
+        self._removed: Set[str] = set()
+        self._pending: Dict[str, Tuple[bytes, int, int]] = {}
+
+        self._dead_bytes = 0
+        self._data_file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._decoded: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def open(self) -> "MaskStore":
+        """映射索引与数据文件
+
+        Returns:
+            MaskStore: self
+        """
+        with self._lock:
+            live_bytes = self._map_index()
+            self._map_data()
+
+            # 数据文件中未被索引引用的部分视为失效数据
+            data_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+            self._dead_bytes = data_size - live_bytes
+        return self
+
+    def close(self) -> None:
+        """关闭文件映射, 未flush的暂存数据会被丢弃"""
+        with self._lock:
+            self._unmap_data()
+            self._unmap_index()
+            self._decoded.clear()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.keys())
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending or self._lookup(key) is not None
+
+    def keys(self) -> Iterator[str]:
+        """所有mask的键"""
+        with self._lock:
+            keys = {key for key, _ in self._iter_entries()} | self._pending.keys()
+        return iter(keys)
+
+    @staticmethod
+    def encode(mask: np.ndarray, mode: str = "auto") -> bytes:
+        """编码mask
+
+        Args:
+            mask: 二维uint8数组
+            mode: 编码方式, 见 MaskCodec.MODES
+
+        Returns:
+            bytes: 编码后的数据
+        """
+        return MaskCodec.encode(mask, mode)
+
+    @staticmethod
+    def decode(
+        payload: bytes, height: Optional[int] = None, width: Optional[int] = None
+    ) -> np.ndarray:
+        """解码mask
+
+        Args:
+            payload: 编码后的数据
+            height: mask高度, 仅旧版无格式头数据需要
+            width: mask宽度, 仅旧版无格式头数据需要
+
+        Returns:
+            np.ndarray: 二维uint8数组
+        """
+        return MaskCodec.decode(payload, height, width)
+
+    def get_payload(self, key: str) -> Optional[Tuple[bytes, int, int]]:
+        """读取编码后的mask数据
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Tuple[bytes, int, int] | None: (编码后的数据, 高度, 宽度), 不存在返回None
+        """
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+
+            entry = self._lookup(key)
+            if entry is None or self._mmap is None:
+                return None
+
+            offset, length, height, width = entry
+            return self._mmap[offset : offset + length], height, width
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """读取mask, 优先从内存LRU中获取
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            np.ndarray | None: 只读的mask数组, 不存在返回None
+        """
+        with self._lock:
+            mask = self._decoded.get(key)
+            if mask is not None:
+                self._decoded.move_to_end(key)
+                return mask
+
+        payload = self.get_payload(key)
+        if payload is None:
+            return None
+
+        mask = self.decode(*payload)
+        mask.flags.writeable = False
+        if self.cache_size > 0:
+            with self._lock:
+                self._decoded[key] = mask
+                while len(self._decoded) > self.cache_size:
+                    self._decoded.popitem(last=False)
+        return mask
+
+    def put_payload(self, key: str, payload: bytes, height: int, width: int) -> None:
+        """暂存编码后的mask数据, flush时写入数据文件
+
+        Args:
+            key: 缓存键
+            payload: 编码后的数据
+            height: mask高度
+            width: mask宽度
+        """
+        with self._lock:
+            self._drop(key)
+            self._pending[key] = (payload, height, width)
+
+    def put(self, key: str, mask: np.ndarray, mode: str = "auto") -> bytes:
+        """暂存mask, flush时写入数据文件
+
+        Args:
+            key: 缓存键
+            mask: 二维uint8数组
+            mode: 编码方式, 见 MaskCodec.MODES
+
+        Returns:
+            bytes: 编码后的数据
+        """
+        payload = self.encode(mask, mode)
+        self.put_payload(key, payload, *mask.shape[:2])
+        return payload
+
+    def remove(self, key: str) -> None:
+        """删除mask, 数据文件中的空间在压缩时回收
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._drop(key)
+
+    def flush(self) -> None:
+        """将暂存数据追加到数据文件, 并重写索引
+
+        没有变更时不做任何写入, 失效数据过多时重写整个数据文件
+        """
+        with self._lock:
+            data_size = self.data_path.stat().st_size if self.data_path.exists() else 0
+            need_compact = data_size and self._dead_bytes > data_size * self.COMPACT_RATIO
+            if not (self._pending or self._removed or need_compact):
+                return
+
+            entries = dict(self._iter_entries())
+            if need_compact:
+                entries = self._compact(entries)
+
+            if self._pending:
+                self._unmap_data()
+                self.data_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.data_path, "ab") as f:
+                    offset = f.tell()
+                    for key, (payload, height, width) in self._pending.items():
+                        f.write(payload)
+                        entries[key] = (offset, len(payload), height, width)
+                        offset += len(payload)
+                self._pending.clear()
+
+            self._unmap_index()
+            self._write_index(entries)
+            self._removed.clear()
+            self._map_index()
+            self._map_data()
+
+    def _lookup(self, key: str) -> Optional[Tuple[int, int, int, int]]:
+        """查找已写入数据文件的mask位置, 调用方需持有锁"""
+        if key in self._removed:
+            return None
+        return self._search_index(key.encode("utf-8"))
+
+    def _drop(self, key: str) -> None:
+        """移除键, 调用方需持有锁"""
+        self._pending.pop(key, None)
+        self._decoded.pop(key, None)
+        entry = self._lookup(key)
+        if entry is not None:
+            self._removed.add(key)
+            self._dead_bytes += entry[1]
+
+    def _iter_entries(self) -> Iterator[Tuple[str, Tuple[int, int, int, int]]]:
+        """遍历已写入数据文件的所有mask位置, 调用方需持有锁"""
+        for i in range(self._index_count):
+            key_bytes, entry = self._read_record(i)
+            key = key_bytes.decode("utf-8")
+            if key not in self._removed:
+                yield key, entry
+
+    def _compact(
+        self, entries: Dict[str, Tuple[int, int, int, int]]
+    ) -> Dict[str, Tuple[int, int, int, int]]:
+        """重写数据文件, 只保留仍被引用的数据, 调用方需持有锁
+
+        Args:
+            entries: 仍被引用的mask位置
+
+        Returns:
+            Dict[str, Tuple[int, int, int, int]]: 重写后的mask位置
+        """
+        if self._mmap is None:
+            return entries
+
+        temp_path = self.data_path.with_suffix(self.data_path.suffix + ".tmp")
+        new_entries = {}
+        with open(temp_path, "wb") as f:
+            for key, (offset, length, height, width) in entries.items():
+                new_entries[key] = (f.tell(), length, height, width)
+                f.write(self._mmap[offset : offset + length])
+
+        self._unmap_data()
+        os.replace(temp_path, self.data_path)
+        self._dead_bytes = 0
+        return new_entries
+
+    def _map_data(self) -> None:
+        """只读映射数据文件, 调用方需持有锁"""
+        self._unmap_data()
+        if not self.data_path.exists() or self.data_path.stat().st_size == 0:
+            return
+        self._data_file = open(self.data_path, "rb")
+        self._mmap = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _unmap_data(self) -> None:
+        """解除数据文件映射, 调用方需持有锁"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._data_file is not None:
+            self._data_file.close()
+            self._data_file = None
+
+    def _map_index(self) -> int:
+        """只读映射索引文件, 调用方需持有锁
+
+        Returns:
+            int: 索引引用的数据总字节数
+        """
+        self._unmap_index()
+        if not self.index_path.exists() or self.index_path.stat().st_size == 0:
+            return 0
+
+        self._index_file = open(self.index_path, "rb")
+        self._index_map = mmap.mmap(
+            self._index_file.fileno(), 0, access=mmap.ACCESS_READ
+        )
+        magic, version = struct.unpack_from("<4sH", self._index_map, 0)
+        if magic != self.INDEX_MAGIC:
+            self._unmap_index()
+            raise ValueError(f"不支持的索引格式: {self.index_path}")
+
+        if version != self.INDEX_VERSION:
+            self._unmap_index()
+            raise ValueError(f"不支持的索引版本: {self.index_path}")
+
+        _, _, self._index_count, live_bytes = self._HEADER.unpack_from(
+            self._index_map, 0
+        )
+        return live_bytes
+
+    def _unmap_index(self) -> None:
+        """解除索引文件映射, 调用方需持有锁"""
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        self._index_count = 0
+
+    def _read_record(self, i: int) -> Tuple[bytes, Tuple[int, int, int, int]]:
+        """读取第i条索引记录
+
+        Returns:
+            Tuple[bytes, Tuple[int, int, int, int]]: (键, (偏移, 长度, 高度, 宽度))
+        """
+        key_offset, key_len, *entry = self._RECORD.unpack_from(
+            self._index_map, self._HEADER.size + i * self._RECORD.size
+        )
+        start = self._HEADER.size + self._index_count * self._RECORD.size + key_offset
+        return self._index_map[start : start + key_len], tuple(entry)
+
+    def _search_index(self, key: bytes) -> Optional[Tuple[int, int, int, int]]:
+        """在排序后的磁盘索引中二分查找
+
+        Args:
+            key: UTF-8编码的缓存键
+
+        Returns:
+            Tuple[int, int, int, int] | None: (偏移, 长度, 高度, 宽度), 不存在返回None
+        """
+        low, high = 0, self._index_count
+        while low < high:
+            mid = (low + high) // 2
+            mid_key, entry = self._read_record(mid)
+            if mid_key == key:
+                return entry
+            if mid_key < key:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+
+    def _write_index(self, entries: Dict[str, Tuple[int, int, int, int]]) -> None:
+        """按键排序后原子地重写索引文件, 调用方需持有锁
+
+        Args:
+            entries: {键: (偏移, 长度, 高度, 宽度)}
+        """
+        sorted_entries = sorted(
+            (key.encode("utf-8"), entry) for key, entry in entries.items()
+        )
+        live_bytes = sum(entry[1] for _, entry in sorted_entries)
+
+        records = []
+        key_offset = 0
+        for key_bytes, entry in sorted_entries:
+            records.append(self._RECORD.pack(key_offset, len(key_bytes), *entry))
+            key_offset += len(key_bytes)
+
+        header = self._HEADER.pack(
+            self.INDEX_MAGIC, self.INDEX_VERSION, len(sorted_entries), live_bytes
+        )
+        keys = [key_bytes for key_bytes, _ in sorted_entries]
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+        temp_path.write_bytes(header + b"".join(records) + b"".join(keys))
+        os.replace(temp_path, self.index_path)
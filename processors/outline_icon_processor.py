@@ -1,14 +1,39 @@
 import os
 import threading
+import functools
+import numpy as np
 import xml.etree.ElementTree as ET
 
-from io import BytesIO
 from pathlib import Path
-from typing import Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+
+from PIL import Image
+
+from processors.tint_engine import TintEngine
+from processors.svg_rasterizer import SvgRasterizer
+from processors.raster_cache import RasterCache
+from processors.render_plan import RenderPlan, RenderTask
+from processors.icon_zip_sink import IconZipSink
+from processors.build_manifest import BuildManifest
+from processors.process_backend import ProcessRenderBackend
+from processors.render_scheduler import RenderScheduler, RenderStage
+from configs.config import PerformanceConfig
+
+
+@dataclass(frozen=True)
+class OutlineRenderContext:
+    """轮廓风格图标的渲染上下文
+
+    Attributes:
+        fg_color: 前景色
+        icon_size: 图标尺寸
+        icon_scale: 图标缩放比例
+    """
 
-from PIL import Image, ImageColor
-from cairosvg import svg2png
+    fg_color: str
+    icon_size: int
+    icon_scale: float
 
 
 # 图标处理器
@@ -21,22 +46,30 @@ class OutlineIconProcessor:
     3. 前景色替换
     4. 尺寸缩放
     5. 图标映射解析
-    6. 多线程支持
+    6. 多线程/多进程支持
+    7. 相同图标只渲染一次
+    8. 增量构建, 输入未变化的图标复用上次结果
     """
 
     # 线程锁和计数器
     counter_lock = threading.Lock()
     processed_count = 0
 
+    # 增量构建清单, 未启用时为None
+    build_manifest: Optional[BuildManifest] = None
+
     @classmethod
-    def increment_counter(cls) -> int:
+    def increment_counter(cls, step: int = 1) -> int:
         """增加处理计数
 
+        Args:
+            step: 增加的数量, 默认1
+
         Returns:
             int: 当前处理数量
         """
         with cls.counter_lock:
-            cls.processed_count += 1
+            cls.processed_count += step
             return cls.processed_count
 
     @classmethod
@@ -89,47 +122,77 @@ class OutlineIconProcessor:
             Image.Image: 处理后的PNG图像
         """
 
-        # 缩放后实际大小
-        icon_actual_size = int(icon_size * icon_scale)
-
-        # svg转换为png
-        try:
-            png_data = svg2png(
-                file_obj=open(svg_path, "rb"),
-                output_width=icon_actual_size,
-                output_height=icon_actual_size,
-            )
-        except Exception as e:
-            print(f"Error processing SVG {svg_path}: {e}")
+        # 直接居中绘制到透明画布
+        rgba = SvgRasterizer.render_rgba(svg_path, icon_size, icon_scale)
+        if rgba is None:
             return None
 
-        # 创建图标图像
-        icon = Image.open(BytesIO(png_data))
-
-        # 创建透明画布
-        final_icon = Image.new("RGBA", (icon_size, icon_size), (0, 0, 0, 0))
-
-        # 居中放置图标
-        paste_x = (icon_size - icon_actual_size) // 2
-        paste_y = (icon_size - icon_actual_size) // 2
-        final_icon.paste(icon, (paste_x, paste_y), icon)
+        final_icon = Image.fromarray(rgba, "RGBA")
 
         # 着色前景色
         if fg_color.upper() != "#000000":
-            data = final_icon.getdata()
-            new_data = []
-            fg_color_rgb = ImageColor.getrgb(fg_color)
+            final_icon = TintEngine.tint_image(final_icon, fg_color)
 
-            for item in data:
-                # 保持透明度, 仅改变颜色
-                if item[3] != 0:  # 如果不完全透明
-                    new_data.append((*fg_color_rgb, item[3]))
-                else:
-                    new_data.append(item)
+        return final_icon
 
-            final_icon.putdata(new_data)
+    @classmethod
+    def render_line_alpha(
+        cls,
+        svg_path: str,
+        content_hash: str,
+        icon_size: int,
+        icon_scale: float,
+    ) -> Optional[np.ndarray]:
+        """获取线条的alpha覆盖率
 
-        return final_icon
+        栅格化结果只保存alpha覆盖率, 与前景色无关, 命中缓存时不调用cairosvg
+
+        Args:
+            svg_path: SVG文件路径
+            content_hash: SVG文件内容哈希
+            icon_size: 目标尺寸
+            icon_scale: 缩放比例
+
+        Returns:
+            np.ndarray | None: shape为(icon_size, icon_size)的uint8数组, 失败返回None
+        """
+        alpha = RasterCache.load(content_hash, icon_size, icon_scale)
+        if alpha is None:
+            alpha = SvgRasterizer.render_alpha(
+                svg_path, icon_size, icon_scale, content_hash
+            )
+            if alpha is None:
+                return None
+            RasterCache.save(alpha, content_hash, icon_size, icon_scale)
+        return alpha
+
+    @classmethod
+    def render_line_layer(
+        cls,
+        svg_path: str,
+        content_hash: str,
+        fg_color: str,
+        icon_size: int,
+        icon_scale: float,
+    ) -> Optional[Image.Image]:
+        """获取着色后的线条图层
+
+        Args:
+            svg_path: SVG文件路径
+            content_hash: SVG文件内容哈希
+            fg_color: 前景色（线条颜色）
+            icon_size: 目标尺寸
+            icon_scale: 缩放比例
+
+        Returns:
+            Image.Image | None: 着色后的RGBA图像, 失败返回None
+        """
+        alpha = cls.render_line_alpha(svg_path, content_hash, icon_size, icon_scale)
+        if alpha is None:
+            return None
+
+        # Lawnicons线条为单色, 未着色时RGB为0, 与直接着色结果一致
+        return TintEngine.tint_alpha(alpha, fg_color)
 
     # 解析icon_mapper映射
     @classmethod
@@ -152,89 +215,185 @@ class OutlineIconProcessor:
         }
 
     @classmethod
-    def process_single_icon(
+    def rasterize_stage(
+        cls, task: RenderTask, context: OutlineRenderContext, _payload: None
+    ) -> Optional[Image.Image]:
+        """栅格化阶段: 获取着色后的线条图层
+
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+            _payload: 无输入
+
+        Returns:
+            Image.Image | None: 着色后的RGBA图像, 失败返回None
+        """
+        line_layer = cls.render_line_layer(
+            str(task.svg_path),
+            task.content_hash,
+            context.fg_color,
+            context.icon_size,
+            context.icon_scale,
+        )
+        if line_layer is None:
+            print(
+                f"    (err) OutlineIconProcessor.generate_icons: 失败 {task.drawable_name} ({task.display_name})"
+            )
+        return line_layer
+
+    @classmethod
+    def encode_stage(
+        cls, task: RenderTask, context: OutlineRenderContext, icon: Image.Image
+    ) -> Tuple[bytes, None]:
+        """编码阶段: 将图标编码为PNG字节
+
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+            icon: 线条图层
+
+        Returns:
+            Tuple[bytes, None]: (编码后的PNG字节, 附加信息)
+        """
+        return RenderPlan.encode_png(icon), None
+
+    @classmethod
+    def write_stage(
         cls,
-        package_name: str,
-        drawable_name: str,
-        svg_dir: Path,
-        output_dir: Path,
-        background: Image.Image,
-        fg_color: str,
-        icon_size: int,
-        icon_scale: float,
+        task: RenderTask,
+        context: OutlineRenderContext,
+        rendered: Tuple[bytes, None],
+        icon_sink: IconZipSink,
+        background_bytes: bytes,
         total_icons: int,
-    ) -> bool:
-        """处理单个图标
+    ) -> Optional[bool]:
+        """写入阶段: 分发渲染结果并更新进度
 
         Args:
-            package_name: 应用包名
-            drawable_name: 图标资源名
-            svg_dir: SVG目录
-            output_dir: 输出目录
-            background: 背景图层
-            fg_color: 前景色
-            icon_size: 图标尺寸
-            icon_scale: 图标缩放比例
+            task: 渲染任务
+            context: 渲染上下文
+            rendered: 编码阶段的输出
+            icon_sink: 图标压缩包写入器
+            background_bytes: 编码后的背景 0.png
             total_icons: 总图标数
 
         Returns:
-            bool: 处理成功返回True
+            bool | None: 处理成功返回True, 失败返回None
         """
-        svg_path = svg_dir / f"{drawable_name}.svg"
+        icon_bytes, _ = rendered
+        if cls.finish_task(task, icon_bytes, icon_sink, background_bytes, total_icons):
+            return True
+        return None
 
-        if not svg_path.exists():
-            print(
-                f"    (err) OutlineIconProcessor.generate_icons: 未找到对应svg文件 {drawable_name} ({package_name})"
-            )
-            return False
+    @classmethod
+    def render_stages(cls, max_workers: int = 1) -> List[RenderStage]:
+        """渲染流水线: 栅格化 -> 编码
 
-        icon_dir = output_dir / package_name
-        icon_dir.mkdir(exist_ok=True)
+        Args:
+            max_workers: 未单独配置线程数的阶段使用的线程数
 
-        # 背景 0.png
-        background.save(icon_dir / "0.png", "PNG")
+        Returns:
+            List[RenderStage]: 流水线阶段
+        """
+        return [
+            RenderStage(
+                "rasterize",
+                cls.rasterize_stage,
+                PerformanceConfig.get_stage_workers("rasterize", max_workers),
+            ),
+            RenderStage(
+                "encode",
+                cls.encode_stage,
+                PerformanceConfig.get_stage_workers("encode", max_workers),
+            ),
+        ]
 
-        # 图标 1.png
-        icon = cls.process_svg(str(svg_path), fg_color, icon_size, icon_scale)
-        if icon:
-            icon.save(icon_dir / "1.png", "PNG")
-            count = cls.increment_counter()
-            cls.update_progress(count, total_icons, drawable_name, package_name)
-            return True
-        else:
-            print(
-                f"    (err) OutlineIconProcessor.generate_icons: 失败 {drawable_name} ({package_name})"
-            )
+    @classmethod
+    def render_task(
+        cls, task: RenderTask, context: OutlineRenderContext
+    ) -> Tuple[Optional[bytes], None]:
+        """渲染单个任务的图标 1.png
+
+        不写入文件, 在当前线程依次执行渲染流水线, 供多进程模式使用
+
+        Args:
+            task: 渲染任务
+            context: 渲染上下文
+
+        Returns:
+            Tuple[Optional[bytes], None]: (编码后的PNG字节, 失败时为None; 附加信息)
+        """
+        return RenderScheduler.run_inline(cls.render_stages(), task, context) or (
+            None,
+            None,
+        )
+
+    @classmethod
+    def finish_task(
+        cls,
+        task: RenderTask,
+        icon_bytes: Optional[bytes],
+        icon_sink: IconZipSink,
+        background_bytes: bytes,
+        total_icons: int,
+    ) -> bool:
+        """分发渲染结果并更新进度
+
+        Args:
+            task: 渲染任务
+            icon_bytes: 编码后的图标 1.png, 渲染失败时为None
+            icon_sink: 图标压缩包写入器
+            background_bytes: 编码后的背景 0.png
+            total_icons: 总图标数
+
+        Returns:
+            bool: 处理成功返回True
+        """
+        if icon_bytes is None:
             return False
 
+        RenderPlan.fan_out(task, icon_sink, background_bytes, icon_bytes)
+        if cls.build_manifest is not None:
+            cls.build_manifest.record(task, icon_bytes)
+
+        count = cls.increment_counter(len(task.package_names))
+        cls.update_progress(count, total_icons, task.drawable_name, task.display_name)
+        return True
+
     @classmethod
     def generate_icons(
         cls,
         icon_mapper_path: str,
         svg_dir: str,
-        output_dir: str,
+        icon_sink: IconZipSink,
         fg_color: str,
         bg_color: str,
         icon_size: int,
         icon_scale: float,
         max_workers: int,
+        executor_mode: str = "thread",
+        process_workers: int = 1,
+        process_chunk_size: int = 16,
+        build_cache_dir: Optional[str] = None,
     ) -> None:
         """批量生成轮廓风格图标
 
         Args:
             icon_mapper_path: 图标映射文件路径
             svg_dir: SVG源文件目录
-            output_dir: 输出目录
+            icon_sink: 图标压缩包写入器
             fg_color: 前景色
             bg_color: 背景色
             icon_size: 图标尺寸
             icon_scale: 图标缩放比例
             max_workers: 最大工作线程数
+            executor_mode: 执行模式, "thread" 多线程 / "process" 多进程
+            process_workers: 多进程模式下的进程数
+            process_chunk_size: 多进程模式下每次提交的任务数
+            build_cache_dir: 增量构建缓存目录, 为None时全部重新渲染
         """
         cls.processed_count = 0
 
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
         svg_dir_path = Path(svg_dir)
 
         # 解析icon_mapper
@@ -248,40 +407,105 @@ class OutlineIconProcessor:
         # if max_workers is None:
         #     max_workers = min(128, (os.cpu_count() or 1) * 4)
 
+        # 生成渲染计划, 相同图标只渲染一次
+        tasks, missing = RenderPlan.build(mapper, svg_dir_path)
+        for package_name, drawable_name in missing.items():
+            print(
+                f"    (err) OutlineIconProcessor.generate_icons: 未找到对应svg文件 {drawable_name} ({package_name})"
+            )
+
+        # 背景 0.png 只编码一次
+        background_bytes = RenderPlan.encode_background(
+            background,
+            sum(len(task.package_names) for task in tasks),
+            "OutlineIconProcessor.generate_icons",
+        )
+
         total_icons = len(mapper)
+        successful = 0
+
+        # 增量构建, 输入未变化的图标直接复用
+        cls.build_manifest = None
+        if build_cache_dir:
+            cls.build_manifest = BuildManifest(
+                Path(build_cache_dir) / "outlined",
+                {
+                    "style": "outlined",
+                    "fg_color": fg_color.lower(),
+                    "icon_size": icon_size,
+                    "icon_scale": icon_scale,
+                    "png": RenderPlan.encode_params(),
+                },
+            ).load()
+            reused, tasks, summary = cls.build_manifest.split(tasks)
+            print(
+                f"    OutlineIconProcessor.generate_icons: 增量构建, 未变化 {summary['unchanged']} 个, 变更 {summary['changed']} 个, 新增 {summary['new']} 个, 移除 {summary['removed']} 个, 复用 {len(reused)} 个渲染结果"
+            )
+            for task, icon_bytes in reused:
+                if cls.finish_task(
+                    task, icon_bytes, icon_sink, background_bytes, total_icons
+                ):
+                    successful += len(task.package_names)
+
+        use_process = executor_mode == "process"
+        parallel_desc = (
+            f"当前并行进程数 {process_workers}"
+            if use_process
+            else f"当前并行线程数 {max_workers}"
+        )
         print(
-            f"  (3/4) OutlineIconProcessor.generate_icons: 找到 {total_icons} 个图标需要处理, 当前并行线程数 {max_workers} , 大约需要 5 分钟"
+            f"  (3/4) OutlineIconProcessor.generate_icons: 找到 {total_icons} 个图标需要处理, 去重后需渲染 {len(tasks)} 个, {parallel_desc} , 大约需要 5 分钟"
         )
 
-        # 多线程处理
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_package = {
-                executor.submit(
-                    cls.process_single_icon,
-                    package_name,
-                    drawable_name,
-                    svg_dir_path,
-                    output_path,
-                    background,
-                    fg_color,
-                    icon_size,
-                    icon_scale,
-                    total_icons,
-                ): package_name
-                for package_name, drawable_name in mapper.items()
-            }
-
-            successful = 0
-            for future in as_completed(future_to_package):
-                package_name = future_to_package[future]
+        context = OutlineRenderContext(fg_color, icon_size, icon_scale)
+        if use_process:
+            # 多进程处理
+            results = ProcessRenderBackend.run(
+                cls.render_task, context, tasks, process_workers, process_chunk_size
+            )
+            for task, icon_bytes, _ in results:
                 try:
-                    if future.result():
-                        successful += 1
+                    if cls.finish_task(
+                        task, icon_bytes, icon_sink, background_bytes, total_icons
+                    ):
+                        successful += len(task.package_names)
                 except Exception as e:
                     print(
-                        f"    (err) OutlineIconProcessor.generate_icons: 处理 {package_name} 时发生错误: {e}"
+                        f"    (err) OutlineIconProcessor.generate_icons: 处理 {task.display_name} 时发生错误: {e}"
                     )
+        else:
+            # 多线程流水线: 栅格化 -> 编码 -> 写入, 共用常驻的渲染调度器
+            write_stage = functools.partial(
+                cls.write_stage,
+                icon_sink=icon_sink,
+                background_bytes=background_bytes,
+                total_icons=total_icons,
+            )
+            stages = cls.render_stages(max_workers) + [
+                RenderStage(
+                    "write",
+                    write_stage,
+                    PerformanceConfig.get_stage_workers("write", max_workers),
+                )
+            ]
+            results = RenderScheduler.shared(PerformanceConfig.render_queue_size).run(
+                stages,
+                context,
+                tasks,
+                (
+                    "OutlineIconProcessor.generate_icons"
+                    if PerformanceConfig.enable_pipeline_stats
+                    else None
+                ),
+            )
+            for task, written in results:
+                if written:
+                    successful += len(task.package_names)
 
         print(
             f"\n  (4/4) OutlineIconProcessor.generate_icons: 图标处理完成, 成功处理 {successful}/{total_icons}"
         )
+
+        # 保存增量构建清单
+        if cls.build_manifest is not None:
+            cls.build_manifest.save()
@@ -0,0 +1,188 @@
+import zlib
+import struct
+import numpy as np
+
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+
+class PngEncoder:
+    """PNG编码器
+
+    图标最终以 ZIP_STORED 存入压缩包, PNG自身的zlib压缩决定了工件大小, 也占据了大部分编码耗时:
+    1. fast: zlib压缩级别1, 用于CI与日常调试
+    2. default: Pillow默认参数, 与旧版输出逐字节一致
+    3. compact: Pillow optimize, 压缩级别9, 用于正式发布
+    4. 过滤方式为 none 时跳过Pillow逐行选择过滤器的启发式搜索,
+       每行使用过滤器0, 由NumPy直接拼接扫描线后交给zlib
+    5. 调色板模式下, 不同RGBA颜色不超过256种的图标无损写为索引色PNG + tRNS,
+       按颜色数选择1/2/4/8位深度, 否则仍写为RGBA
+    """
+
+    # 编码模式对应的zlib压缩级别
+    MODES = {"fast": 1, "default": 6, "compact": 9}
+
+    # 过滤方式: adaptive 由Pillow逐行选择过滤器, none 每行不过滤
+    FILTERS = ("adaptive", "none")
+
+    # PNG颜色类型
+    _COLOR_TYPES = {"L": 0, "RGB": 2, "LA": 4, "RGBA": 6}
+
+    _SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+    @classmethod
+    def encode(
+        cls, image: Image.Image, mode: str, png_filter: str, palette: bool = False
+    ) -> bytes:
+        """将图像编码为PNG字节
+
+        Args:
+            image: 图像
+            mode: 编码模式, fast/default/compact
+            png_filter: 过滤方式, adaptive/none
+            palette: 是否尝试写为索引色PNG
+
+        Returns:
+            bytes: PNG字节
+        """
+        if mode not in cls.MODES:
+            raise ValueError(f"未知的PNG编码模式: {mode}")
+        if png_filter not in cls.FILTERS:
+            raise ValueError(f"未知的PNG过滤方式: {png_filter}")
+
+        if palette and image.mode == "RGBA":
+            png_bytes = cls.encode_palette(image, cls.MODES[mode])
+            if png_bytes is not None:
+                return png_bytes
+
+        if png_filter == "none" and image.mode in cls._COLOR_TYPES:
+            return cls.write_png(
+                np.asarray(image), cls._COLOR_TYPES[image.mode], cls.MODES[mode]
+            )
+
+        buffer = BytesIO()
+        if mode == "default":
+            image.save(buffer, "PNG")
+        elif mode == "compact":
+            image.save(buffer, "PNG", optimize=True)
+        else:
+            image.save(buffer, "PNG", compress_level=cls.MODES[mode])
+        return buffer.getvalue()
+
+    @classmethod
+    def encode_palette(cls, image: Image.Image, level: int) -> Optional[bytes]:
+        """无损写为索引色PNG
+
+        Args:
+            image: RGBA图像
+            level: zlib压缩级别
+
+        Returns:
+            bytes | None: PNG字节, 颜色超过256种时返回None
+        """
+        # getcolors 超过上限时立即返回None, 多色图标的判断开销很小
+        counted = image.getcolors(256)
+        if counted is None:
+            return None
+
+        rgba = np.array([color for _, color in counted], dtype=np.uint8)
+        colors = rgba.view(np.uint32).reshape(-1)
+        order = np.argsort(colors)
+        colors, rgba = colors[order], rgba[order]
+
+        # 半透明颜色排在调色板前面, tRNS只需覆盖这些条目
+        palette_order = np.argsort(rgba[:, 3] == 255, kind="stable")
+        lut = np.empty(len(colors), dtype=np.uint8)
+        lut[palette_order] = np.arange(len(colors))
+        rgba = rgba[palette_order]
+        translucent = int(np.count_nonzero(rgba[:, 3] < 255))
+
+        pixels = np.ascontiguousarray(np.asarray(image)).view(np.uint32)[..., 0]
+        indices = lut[np.searchsorted(colors, pixels)]
+
+        bit_depth = next(bits for bits in (1, 2, 4, 8) if len(colors) <= 1 << bits)
+        return cls.write_png(
+            indices,
+            3,
+            level,
+            palette=rgba[:, :3].tobytes(),
+            transparency=rgba[:translucent, 3].tobytes() if translucent else None,
+            bit_depth=bit_depth,
+        )
+
+    @staticmethod
+    def pack_rows(indices: np.ndarray, bit_depth: int) -> np.ndarray:
+        """将每像素不足8位的索引按行打包, 高位在前
+
+        Args:
+            indices: shape为(H, W)的uint8数组
+            bit_depth: 位深度, 1/2/4
+
+        Returns:
+            np.ndarray: shape为(H, ceil(W * bit_depth / 8))的uint8数组
+        """
+        height, width = indices.shape
+        per_byte = 8 // bit_depth
+        padded_width = -(-width // per_byte) * per_byte
+        padded = np.zeros((height, padded_width), dtype=np.uint8)
+        padded[:, :width] = indices
+        groups = padded.reshape(height, -1, per_byte)
+
+        packed = np.zeros(groups.shape[:2], dtype=np.uint8)
+        for i in range(per_byte):
+            packed |= groups[..., i] << (8 - bit_depth * (i + 1))
+        return packed
+
+    @classmethod
+    def write_png(
+        cls,
+        pixels: np.ndarray,
+        color_type: int,
+        level: int,
+        palette: Optional[bytes] = None,
+        transparency: Optional[bytes] = None,
+        bit_depth: int = 8,
+    ) -> bytes:
+        """直接写出PNG, 每行使用过滤器0
+
+        Args:
+            pixels: shape为(H, W)或(H, W, C)的uint8数组, 位深度小于8时为索引
+            color_type: PNG颜色类型, 0/2/3/4/6
+            level: zlib压缩级别
+            palette: 颜色类型为3时的PLTE数据, RGB三元组
+            transparency: tRNS数据
+            bit_depth: 位深度, 小于8时仅用于索引色
+
+        Returns:
+            bytes: PNG字节
+        """
+        height, width = pixels.shape[:2]
+        if bit_depth < 8:
+            rows = cls.pack_rows(pixels, bit_depth)
+        else:
+            rows = pixels.reshape(height, -1)
+
+        # 每行前补一个过滤器类型字节0
+        scanlines = np.zeros((height, rows.shape[1] + 1), dtype=np.uint8)
+        scanlines[:, 1:] = rows
+
+        header = struct.pack(
+            ">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0
+        )
+        chunks = [(b"IHDR", header)]
+        if palette is not None:
+            chunks.append((b"PLTE", palette))
+        if transparency is not None:
+            chunks.append((b"tRNS", transparency))
+        chunks.append((b"IDAT", zlib.compress(scanlines.tobytes(), level)))
+        chunks.append((b"IEND", b""))
+
+        output = [cls._SIGNATURE]
+        for chunk_type, data in chunks:
+            output.append(struct.pack(">I", len(data)))
+            output.append(chunk_type)
+            output.append(data)
+            output.append(struct.pack(">I", zlib.crc32(chunk_type + data)))
+        return b"".join(output)
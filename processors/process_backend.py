@@ -0,0 +1,117 @@
+import os
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from configs.config import PerformanceConfig
+from processors.render_plan import RenderTask
+
+
+class ProcessRenderBackend:
+    """多进程渲染后端
+
+    绕开GIL, 将CPU密集的渲染任务分发到多个进程:
+    1. 任务按chunk_size分块提交, 减少进程间通信次数
+    2. 每个进程启动时初始化一次渲染上下文(进程级热缓存), 并还原主进程的 PerformanceConfig
+    3. 子进程只回传编码后的PNG字节, 不传输PIL图像
+    4. 子进程崩溃时, 受影响的任务记为失败, 不中断整个构建
+    """
+
+    # 子进程内的渲染函数与渲染上下文
+    _worker_renderer: Optional[Callable] = None
+    _worker_context: Any = None
+
+    @classmethod
+    def _init_worker(
+        cls, renderer: Callable, context: Any, config: Dict[str, Any]
+    ) -> None:
+        """子进程初始化
+
+        Args:
+            renderer: 渲染函数, 签名为 renderer(task, context) -> (bytes | None, extra)
+            context: 渲染上下文, 需可被pickle
+            config: 主进程的 PerformanceConfig 快照, spawn 启动的子进程重新导入配置后还原命令行参数
+        """
+        PerformanceConfig.restore(config)
+        cls._worker_renderer = renderer
+        cls._worker_context = context
+
+        # 每个进程只使用单线程, 避免与进程池争抢CPU
+        try:
+            import cv2
+
+            cv2.setNumThreads(1)
+        except ImportError:
+            pass
+
+    @classmethod
+    def _render_chunk(
+        cls, chunk: List[Tuple[int, RenderTask]]
+    ) -> List[Tuple[int, Optional[bytes], Any]]:
+        """在子进程中渲染一个任务块
+
+        Args:
+            chunk: [(任务序号, 渲染任务)] 列表
+
+        Returns:
+            List[Tuple[int, Optional[bytes], Any]]: [(任务序号, PNG字节, 附加信息)] 列表
+        """
+        results = []
+        for index, task in chunk:
+            try:
+                icon_bytes, extra = cls._worker_renderer(task, cls._worker_context)
+            except Exception as e:
+                print(f"\n    (err) 子进程处理 {task.display_name} 时发生错误: {e}")
+                icon_bytes, extra = None, None
+            results.append((index, icon_bytes, extra))
+        return results
+
+    @classmethod
+    def run(
+        cls,
+        renderer: Callable,
+        context: Any,
+        tasks: List[RenderTask],
+        max_workers: int,
+        chunk_size: int,
+    ) -> Iterator[Tuple[RenderTask, Optional[bytes], Any]]:
+        """使用进程池渲染所有任务
+
+        Args:
+            renderer: 渲染函数, 需可被pickle (模块级函数或类方法)
+            context: 渲染上下文
+            tasks: 渲染任务列表
+            max_workers: 最大进程数
+            chunk_size: 每次提交的任务数
+
+        Yields:
+            Tuple[RenderTask, Optional[bytes], Any]: (渲染任务, PNG字节, 附加信息), 按完成顺序
+        """
+        max_workers = max(1, min(max_workers, os.cpu_count() or 1))
+        chunk_size = max(1, chunk_size)
+        indexed_tasks = list(enumerate(tasks))
+        chunks = [
+            indexed_tasks[i : i + chunk_size]
+            for i in range(0, len(indexed_tasks), chunk_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=cls._init_worker,
+            initargs=(renderer, context, PerformanceConfig.snapshot()),
+        ) as executor:
+            futures = {
+                executor.submit(cls._render_chunk, chunk): chunk for chunk in chunks
+            }
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # 子进程崩溃(BrokenProcessPool)等, 该块的任务记为失败
+                    chunk = futures[future]
+                    print(
+                        f"\n    (err) 子进程渲染失败, {len(chunk)} 个图标未完成: {e!r}"
+                    )
+                    results = [(index, None, None) for index, _ in chunk]
+                for index, icon_bytes, extra in results:
+                    yield tasks[index], icon_bytes, extra
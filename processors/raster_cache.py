@@ -0,0 +1,89 @@
+import os
+import tempfile
+import numpy as np
+
+from pathlib import Path
+from typing import Optional
+
+from configs.config import PerformanceConfig
+from processors.mask_codec import MaskCodec
+
+
+class RasterCache:
+    """SVG栅格化缓存
+
+    缓存SVG栅格化后的alpha覆盖率, 与前景色无关:
+    1. 缓存键只包含SVG内容哈希、尺寸和缩放比例
+    2. 前景色在合成时由 TintEngine 着色
+    3. 缓存位于构建缓存目录下的 raster/, 跨构建、跨主题复用, 命中时不再调用cairosvg
+    """
+
+    @staticmethod
+    def get_cache_path(content_hash: str, size: int, icon_scale: float) -> Path:
+        """获取缓存文件路径
+
+        Args:
+            content_hash: SVG文件内容哈希
+            size: 图标尺寸
+            icon_scale: 图标缩放比例
+
+        Returns:
+            Path: 缓存文件路径
+        """
+        return (
+            PerformanceConfig.build_cache_dir
+            / "raster"
+            / f"{content_hash}_s{size}_sc{icon_scale:.3f}.alpha"
+        )
+
+    @classmethod
+    def load(
+        cls, content_hash: str, size: int, icon_scale: float
+    ) -> Optional[np.ndarray]:
+        """读取alpha覆盖率
+
+        Args:
+            content_hash: SVG文件内容哈希
+            size: 图标尺寸
+            icon_scale: 图标缩放比例
+
+        Returns:
+            np.ndarray | None: shape为(size, size)的uint8数组, 未命中返回None
+        """
+        if not PerformanceConfig.enable_raster_cache:
+            return None
+
+        try:
+            payload = cls.get_cache_path(content_hash, size, icon_scale).read_bytes()
+            return MaskCodec.decode(payload)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"    (err) 读取栅格化缓存失败 {content_hash}: {e}")
+            return None
+
+    @classmethod
+    def save(
+        cls, alpha: np.ndarray, content_hash: str, size: int, icon_scale: float
+    ) -> None:
+        """保存alpha覆盖率, 先写唯一命名的临时文件再重命名, 多线程、多进程同时写入安全
+
+        Args:
+            alpha: shape为(size, size)的uint8数组
+            content_hash: SVG文件内容哈希
+            size: 图标尺寸
+            icon_scale: 图标缩放比例
+        """
+        if not PerformanceConfig.enable_raster_cache:
+            return
+
+        try:
+            cache_path = cls.get_cache_path(content_hash, size, icon_scale)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=cache_path.parent, suffix=".tmp", delete=False
+            ) as temp_file:
+                temp_file.write(MaskCodec.encode(alpha, "raw"))
+            os.replace(temp_file.name, cache_path)
+        except Exception as e:
+            print(f"    (err) 保存栅格化缓存失败 {content_hash}: {e}")
@@ -0,0 +1,171 @@
+import time
+import hashlib
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+
+from PIL import Image
+
+from processors.icon_zip_sink import IconZipSink
+from processors.png_encoder import PngEncoder
+from configs.config import PerformanceConfig
+
+
+@dataclass
+class RenderTask:
+    """渲染任务
+
+    一份SVG内容只渲染一次, 结果分发到所有引用它的包名
+
+    Attributes:
+        drawable_name: 代表图标名, 用于渲染和缓存
+        svg_path: 代表图标的SVG路径
+        content_hash: SVG内容哈希
+        drawable_names: 内容相同的所有图标名
+        package_names: 使用该图标的所有包名
+    """
+
+    drawable_name: str
+    svg_path: Path
+    content_hash: str
+    drawable_names: List[str] = field(default_factory=list)
+    package_names: List[str] = field(default_factory=list)
+
+    @property
+    def display_name(self) -> str:
+        """进度显示用的包名描述"""
+        if len(self.package_names) > 1:
+            return f"{self.package_names[0]} 等{len(self.package_names)}个"
+        return self.package_names[0]
+
+
+class RenderPlan:
+    """渲染计划
+
+    将 {包名: 图标名} 映射转换为以图标为索引的渲染任务:
+    1. 按图标名合并包名
+    2. 按SVG内容哈希合并内容相同的图标
+    3. 渲染结果以编码后的PNG字节分发到各包名
+    """
+
+    @staticmethod
+    def hash_svg(svg_path: Path) -> str:
+        """计算SVG文件内容哈希
+
+        Args:
+            svg_path: SVG文件路径
+
+        Returns:
+            str: 内容哈希
+        """
+        return hashlib.blake2b(svg_path.read_bytes(), digest_size=16).hexdigest()
+
+    @classmethod
+    def build(
+        cls, mapper: Dict[str, str], svg_dir: Path
+    ) -> Tuple[List[RenderTask], Dict[str, str]]:
+        """生成渲染计划
+
+        Args:
+            mapper: {包名: 图标名} 映射
+            svg_dir: SVG目录
+
+        Returns:
+            Tuple[List[RenderTask], Dict[str, str]]:
+                渲染任务列表, 以及未找到SVG文件的 {包名: 图标名}
+        """
+        # 按图标名合并包名
+        drawable_packages: Dict[str, List[str]] = {}
+        for package_name, drawable_name in mapper.items():
+            drawable_packages.setdefault(drawable_name, []).append(package_name)
+
+        # 按内容哈希合并图标
+        tasks: Dict[str, RenderTask] = {}
+        missing: Dict[str, str] = {}
+        for drawable_name, package_names in drawable_packages.items():
+            svg_path = svg_dir / f"{drawable_name}.svg"
+            if not svg_path.exists():
+                missing.update({package: drawable_name for package in package_names})
+                continue
+
+            content_hash = cls.hash_svg(svg_path)
+            task = tasks.setdefault(
+                content_hash, RenderTask(drawable_name, svg_path, content_hash)
+            )
+            task.drawable_names.append(drawable_name)
+            task.package_names.extend(package_names)
+
+        return list(tasks.values()), missing
+
+    @staticmethod
+    def encode_png(image: Image.Image) -> bytes:
+        """将图像编码为PNG字节
+
+        Args:
+            image: 图像
+
+        Returns:
+            bytes: PNG字节
+        """
+        return PngEncoder.encode(
+            image,
+            PerformanceConfig.png_encode_mode,
+            PerformanceConfig.png_filter,
+            PerformanceConfig.png_palette,
+        )
+
+    @staticmethod
+    def encode_params() -> str:
+        """PNG编码参数描述, 用作增量构建的输入参数"""
+        params = f"{PerformanceConfig.png_encode_mode}/{PerformanceConfig.png_filter}"
+        if PerformanceConfig.png_palette:
+            params += "/palette"
+        return params
+
+    @staticmethod
+    def fan_out(
+        task: RenderTask,
+        icon_sink: IconZipSink,
+        background_bytes: bytes,
+        icon_bytes: bytes,
+    ) -> None:
+        """将渲染结果分发到所有包名
+
+        Args:
+            task: 渲染任务
+            icon_sink: 图标压缩包写入器
+            background_bytes: 编码后的背景 0.png, 整个构建只编码一次
+            icon_bytes: 编码后的图标 1.png
+        """
+        for package_name in task.package_names:
+            # 背景 0.png
+            icon_sink.write_icon(package_name, "0.png", background_bytes)
+
+            # 图标 1.png
+            icon_sink.write_icon(package_name, "1.png", icon_bytes)
+
+    @classmethod
+    def encode_background(
+        cls, background: Image.Image, total_icons: int, caller: str
+    ) -> bytes:
+        """编码背景 0.png, 每次构建只编码一次
+
+        Args:
+            background: 背景图层
+            total_icons: 总图标数, 用于估算节省的编码耗时
+            caller: 调用方名称, 用于日志输出
+
+        Returns:
+            bytes: 编码后的背景PNG字节
+        """
+        encode_start_time = time.time()
+        background_bytes = cls.encode_png(background)
+        encode_time = time.time() - encode_start_time
+
+        saved_time = encode_time * max(total_icons - 1, 0)
+        print(
+            f"    {caller}: 背景 0.png 编码一次耗时 {encode_time * 1000:.2f}毫秒, "
+            f"复用于 {total_icons} 个图标, 节省约 {saved_time:.2f}秒 编码耗时"
+        )
+        return background_bytes
@@ -0,0 +1,440 @@
+import time
+import queue
+import threading
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from processors.render_plan import RenderTask
+
+
+@dataclass(frozen=True)
+class RenderStage:
+    """流水线阶段
+
+    Attributes:
+        name: 阶段名称, 同名阶段共用一组工作线程
+        func: 阶段函数, 签名为 func(task, context, payload) -> payload,
+            返回None表示该任务失败, 不再进入后续阶段
+        workers: 工作线程数
+    """
+
+    name: str
+    func: Callable[[RenderTask, Any, Any], Any]
+    workers: int
+
+
+@dataclass
+class StageStats:
+    """流水线阶段统计
+
+    Attributes:
+        name: 阶段名称
+        workers: 工作线程数
+        processed: 完成的任务数
+        failed: 失败的任务数
+        busy_time: 所有线程处理任务的累计耗时(秒)
+        depth_total: 任务进入阶段时的队列深度之和
+        depth_samples: 队列深度采样次数
+        max_depth: 最大队列深度
+    """
+
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    depth_total: int = 0
+    depth_samples: int = 0
+    max_depth: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def sample_depth(self, depth: int) -> None:
+        """记录一次队列深度"""
+        with self.lock:
+            self.depth_total += depth
+            self.depth_samples += 1
+            self.max_depth = max(self.max_depth, depth)
+
+    def record(self, busy_time: float, ok: bool) -> None:
+        """记录一次任务处理"""
+        with self.lock:
+            self.processed += 1
+            self.failed += not ok
+            self.busy_time += busy_time
+
+    def utilization(self, elapsed: float) -> float:
+        """线程忙碌时间占比"""
+        if elapsed <= 0:
+            return 0.0
+        return self.busy_time / (self.workers * elapsed)
+
+    def summary(self, elapsed: float) -> str:
+        """单行统计描述
+
+        Args:
+            elapsed: 本次运行总耗时(秒)
+
+        Returns:
+            str: 统计描述
+        """
+        throughput = (
+            self.processed * self.workers / self.busy_time if self.busy_time > 0 else 0
+        )
+        avg_depth = self.depth_total / self.depth_samples if self.depth_samples else 0
+        return (
+            f"{self.name:<10} 线程 {self.workers:>3} "
+            f"| 完成 {self.processed} 失败 {self.failed} "
+            f"| 忙碌 {self.busy_time:.2f}秒 利用率 {self.utilization(elapsed) * 100:.0f}% "
+            f"| 吞吐 {throughput:.1f}个/秒 "
+            f"| 队列 平均 {avg_depth:.1f} 最大 {self.max_depth}"
+        )
+
+
+@dataclass
+class RenderRun:
+    """一次 RenderScheduler.run 调用的共享状态
+
+    Attributes:
+        stages: 流水线阶段
+        context: 渲染上下文, 所有阶段共用
+        results: 完成的任务队列, 有界
+        stats: 各阶段统计
+        cancelled: 调用方提前结束迭代或发生异常时置位, 未完成的任务不再继续
+        error: 提交线程或工作线程在阶段函数之外发生的异常, 由 run 在调用方线程重新抛出
+    """
+
+    stages: List[RenderStage]
+    context: Any
+    results: "queue.Queue[Tuple[RenderTask, Any]]"
+    stats: List[StageStats]
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    error: Optional[BaseException] = None
+
+    def fail(self, error: BaseException) -> None:
+        """记录异常并取消本次调用, 只保留第一个异常
+
+        Args:
+            error: 发生的异常
+        """
+        if self.error is None:
+            self.error = error
+        self.cancelled.set()
+
+
+@dataclass
+class RenderJob:
+    """渲染作业, 在流水线各阶段之间传递
+
+    Attributes:
+        task: 渲染任务
+        run: 所属调用的共享状态
+        stage_index: 当前所在阶段
+        payload: 上一阶段的输出
+    """
+
+    task: RenderTask
+    run: RenderRun
+    stage_index: int = 0
+    payload: Any = None
+
+    def execute(self, scheduler: "RenderScheduler") -> None:
+        """执行当前阶段, 并交给下一阶段或回传结果
+
+        Args:
+            scheduler: 所属调度器
+        """
+        run = self.run
+        if run.cancelled.is_set():
+            return
+
+        stage = run.stages[self.stage_index]
+        start_time = time.perf_counter()
+        try:
+            self.payload = stage.func(self.task, run.context, self.payload)
+        except Exception as e:
+            print(
+                f"\n    (err) {stage.name} 阶段处理 {self.task.display_name} 时发生错误: {e}"
+            )
+            self.payload = None
+        run.stats[self.stage_index].record(
+            time.perf_counter() - start_time, self.payload is not None
+        )
+
+        self.stage_index += 1
+        if self.payload is None or self.stage_index == len(run.stages):
+            scheduler.put(run.results, (self.task, self.payload), run.cancelled)
+        else:
+            scheduler.submit(self)
+
+
+class WorkerGroup:
+    """一个流水线阶段的常驻工作线程与有界作业队列"""
+
+    def __init__(self, scheduler: "RenderScheduler", name: str, workers: int):
+        """
+        Args:
+            scheduler: 所属调度器
+            name: 阶段名称
+            workers: 工作线程数
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.jobs: "queue.Queue[Optional[RenderJob]]" = queue.Queue(
+            scheduler.queue_size
+        )
+        self._threads = [
+            threading.Thread(
+                target=self._work_loop,
+                args=(scheduler,),
+                name=f"RenderScheduler-{name}-{i}",
+                daemon=True,
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def shutdown(self) -> None:
+        """等待已提交的作业完成并停止工作线程"""
+        for _ in self._threads:
+            self.jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _work_loop(self, scheduler: "RenderScheduler") -> None:
+        """工作线程, 持续从作业队列取出作业执行
+
+        阶段函数的异常在 RenderJob.execute 中按任务失败处理,
+        其余异常交给所属调用, 工作线程继续服务后续作业
+        """
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                job.execute(scheduler)
+            except BaseException as e:
+                job.run.fail(e)
+
+
+class RenderScheduler:
+    """持久化有界流水线调度器
+
+    将图标渲染拆分为多个阶段(栅格化 -> 蒙版 -> 合成 -> 编码 -> 写入):
+    1. 每个阶段有独立的常驻工作线程, 在两种图标风格、多个主题之间复用
+    2. 阶段之间以有界队列连接, 下游跟不上时逐级阻塞上游, 内存占用可控
+    3. 磁盘写入、PNG编码与栅格化、填充计算互相重叠, 没有批次边界
+    4. 统计各阶段的队列深度、利用率和吞吐, 便于定位瓶颈阶段
+    """
+
+    # 进程内共享的调度器
+    _shared: Optional["RenderScheduler"] = None
+    _shared_lock = threading.Lock()
+
+    # 队列阻塞时检查取消状态的间隔(秒)
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, queue_size: int):
+        """
+        Args:
+            queue_size: 每个阶段的作业队列长度, 以及结果队列长度
+        """
+        self.queue_size = max(1, queue_size)
+        self._groups: Dict[str, WorkerGroup] = {}
+        self._groups_lock = threading.Lock()
+
+        # 正在停止的旧线程组, shutdown 时等待其结束
+        self._retiring: List[threading.Thread] = []
+
+    @classmethod
+    def shared(cls, queue_size: int) -> "RenderScheduler":
+        """获取进程内共享的调度器, 队列长度变化时重建
+
+        Args:
+            queue_size: 每个阶段的作业队列长度
+
+        Returns:
+            RenderScheduler: 共享的调度器
+        """
+        with cls._shared_lock:
+            scheduler = cls._shared
+            if scheduler is None or scheduler.queue_size != max(1, queue_size):
+                if scheduler is not None:
+                    scheduler.shutdown()
+                scheduler = cls._shared = cls(queue_size)
+            return scheduler
+
+    @staticmethod
+    def run_inline(
+        stages: List[RenderStage], task: RenderTask, context: Any
+    ) -> Any:
+        """在当前线程依次执行所有阶段, 供多进程模式的子进程使用
+
+        Args:
+            stages: 流水线阶段
+            task: 渲染任务
+            context: 渲染上下文
+
+        Returns:
+            Any: 最后一个阶段的输出, 失败返回None
+        """
+        payload = None
+        for stage in stages:
+            payload = stage.func(task, context, payload)
+            if payload is None:
+                return None
+        return payload
+
+    @classmethod
+    def put(cls, target: queue.Queue, item: Any, cancelled: threading.Event) -> bool:
+        """向有界队列写入, 队列满时阻塞, 已取消时放弃
+
+        Args:
+            target: 目标队列
+            item: 写入的内容
+            cancelled: 取消标志
+
+        Returns:
+            bool: 写入成功返回True
+        """
+        while not cancelled.is_set():
+            try:
+                target.put(item, timeout=cls._POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def submit(self, job: RenderJob) -> bool:
+        """将作业提交到当前阶段的队列
+
+        Args:
+            job: 渲染作业
+
+        Returns:
+            bool: 提交成功返回True, 已取消返回False
+        """
+        stage = job.run.stages[job.stage_index]
+        group = self._get_group(stage)
+        job.run.stats[job.stage_index].sample_depth(group.jobs.qsize())
+        return self.put(group.jobs, job, job.run.cancelled)
+
+    def run(
+        self,
+        stages: List[RenderStage],
+        context: Any,
+        tasks: List[RenderTask],
+        stats_title: Optional[str] = None,
+    ) -> Iterator[Tuple[RenderTask, Any]]:
+        """使用流水线处理所有任务
+
+        Args:
+            stages: 流水线阶段
+            context: 渲染上下文
+            tasks: 渲染任务列表
+            stats_title: 统计输出的标题, 为None时不输出统计
+
+        Yields:
+            Tuple[RenderTask, Any]: (渲染任务, 最后一个阶段的输出, 失败时为None), 按完成顺序
+
+        Raises:
+            BaseException: 提交任务或调度作业时发生的异常, 在调用方线程重新抛出
+        """
+        render_run = RenderRun(
+            stages,
+            context,
+            queue.Queue(self.queue_size),
+            [StageStats(stage.name, max(1, stage.workers)) for stage in stages],
+        )
+
+        def feed():
+            try:
+                for task in tasks:
+                    if not self.submit(RenderJob(task, render_run)):
+                        return
+            except BaseException as e:
+                render_run.fail(e)
+
+        start_time = time.perf_counter()
+        feeder = threading.Thread(
+            target=feed, name="RenderScheduler-feeder", daemon=True
+        )
+        feeder.start()
+        try:
+            # 定时检查异常, 提交线程或工作线程出错时不会无限等待结果
+            remaining = len(tasks)
+            while remaining:
+                if render_run.error is not None:
+                    raise render_run.error
+                try:
+                    result = render_run.results.get(timeout=self._POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                remaining -= 1
+                yield result
+        finally:
+            # 调用方提前结束时, 剩余作业直接丢弃, 不阻塞工作线程
+            render_run.cancelled.set()
+            feeder.join()
+
+        if stats_title and tasks:
+            self.print_stats(
+                stats_title, render_run.stats, time.perf_counter() - start_time
+            )
+
+    @staticmethod
+    def print_stats(title: str, stats: List[StageStats], elapsed: float) -> None:
+        """输出各阶段统计与瓶颈阶段
+
+        Args:
+            title: 标题
+            stats: 各阶段统计
+            elapsed: 总耗时(秒)
+        """
+        print(f"\n    {title}: 流水线耗时 {elapsed:.2f}秒")
+        for stage_stats in stats:
+            print(f"      {stage_stats.summary(elapsed)}")
+        bottleneck = max(stats, key=lambda s: s.utilization(elapsed))
+        print(f"      瓶颈阶段: {bottleneck.name}")
+
+    def shutdown(self) -> None:
+        """停止所有阶段的工作线程, 并等待正在停止的旧线程组结束"""
+        with self._groups_lock:
+            groups, self._groups = list(self._groups.values()), {}
+            retiring, self._retiring = self._retiring, []
+        for group in groups:
+            group.shutdown()
+        for thread in retiring:
+            thread.join()
+
+    def _get_group(self, stage: RenderStage) -> WorkerGroup:
+        """获取阶段的工作线程组, 线程数变化时重建
+
+        Args:
+            stage: 流水线阶段
+
+        Returns:
+            WorkerGroup: 工作线程组
+        """
+        workers = max(1, stage.workers)
+        with self._groups_lock:
+            group = self._groups.get(stage.name)
+            if group is not None and group.workers == workers:
+                return group
+            new_group = self._groups[stage.name] = WorkerGroup(
+                self, stage.name, workers
+            )
+
+            # 旧线程组处理完已提交的作业后退出
+            if group is not None:
+                retiring = threading.Thread(
+                    target=group.shutdown,
+                    name=f"RenderScheduler-{stage.name}-retire",
+                    daemon=True,
+                )
+                retiring.start()
+                self._retiring = [t for t in self._retiring if t.is_alive()]
+                self._retiring.append(retiring)
+        return new_group
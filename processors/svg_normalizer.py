@@ -0,0 +1,302 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+import cairosvg
+import xml.etree.ElementTree as ET
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from cairosvg.parser import Tree
+
+from configs.config import PerformanceConfig
+
+
+class SvgNormalizer:
+    """SVG规范化缓存
+
+    每个SVG只规范化、解析一次, 以内容哈希为键缓存解析后的 cairosvg Tree:
+    1. 去除注释、metadata/title/desc 以及编辑器命名空间的元素和属性
+    2. 文档没有 <style> 样式表时, 将 style 属性展开为同名的表现属性(stroke、stroke-width 等)
+    3. 去除非文本元素之间的空白后由 cairosvg 解析为Tree
+    4. Tree 以pickle保存在进程内LRU与构建缓存目录下的 svg/ 中, 跨构建复用, 命中时不再读取和解析SVG
+    cairosvg 绘制时会修改节点(删除 use 的 x/y、改写 mask 节点等),
+    因此缓存pickle字节而不是Tree对象, 每次渲染反序列化出独立的副本
+    """
+
+    # 规范化规则版本, 规则变化时旧缓存自动失效
+    VERSION = 2
+
+    SVG_NS = "http://www.w3.org/2000/svg"
+    XLINK_NS = "http://www.w3.org/1999/xlink"
+    XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+    # 不参与渲染的元素
+    _DROPPED_TAGS = {"metadata", "title", "desc"}
+
+    # 空白有意义的文本元素
+    _TEXT_TAGS = {"text", "tspan", "textPath"}
+
+    # 进程内缓存: {内容哈希: pickle后的Tree}, 按最近使用排序
+    _cache: "OrderedDict[str, bytes]" = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def get_cache_path(cls, content_hash: str) -> Path:
+        """获取缓存文件路径, pickle格式随 cairosvg 版本变化, 路径中包含其版本号
+
+        Args:
+            content_hash: SVG文件内容哈希
+
+        Returns:
+            Path: 缓存文件路径
+        """
+        return (
+            PerformanceConfig.build_cache_dir
+            / "svg"
+            / f"{content_hash}_v{cls.VERSION}_cairosvg{cairosvg.__version__}.tree"
+        )
+
+    @classmethod
+    def load(cls, svg_path: str, content_hash: Optional[str] = None) -> Tree:
+        """读取解析后的SVG, 依次查找进程内缓存、构建缓存目录, 都未命中时规范化、解析并保存
+
+        相同内容的SVG共用缓存, Tree的url为首次解析时的路径
+
+        Args:
+            svg_path: SVG文件路径
+            content_hash: SVG文件内容哈希, 为None时由文件内容计算
+
+        Returns:
+            Tree: 解析后的SVG, 每次调用返回新的副本, 可直接绘制
+        """
+        svg_bytes = None
+        if content_hash is None:
+            svg_bytes = Path(svg_path).read_bytes()
+            content_hash = hashlib.blake2b(svg_bytes, digest_size=16).hexdigest()
+
+        pickled = cls._get(content_hash)
+        if pickled is not None:
+            return pickle.loads(pickled)
+
+        cache_path = cls.get_cache_path(content_hash)
+        if PerformanceConfig.enable_svg_cache:
+            try:
+                pickled = cache_path.read_bytes()
+                tree = pickle.loads(pickled)
+                cls._put(content_hash, pickled)
+                return tree
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"    (err) 读取SVG缓存失败 {content_hash}: {e}")
+
+        if svg_bytes is None:
+            svg_bytes = Path(svg_path).read_bytes()
+        tree = Tree(bytestring=cls.normalize(svg_bytes), url=svg_path)
+
+        # 未绘制的Tree与反序列化的副本相同, 直接返回
+        pickled = pickle.dumps(tree, protocol=pickle.HIGHEST_PROTOCOL)
+        if PerformanceConfig.enable_svg_cache:
+            cls.save(pickled, cache_path)
+        cls._put(content_hash, pickled)
+        return tree
+
+    @classmethod
+    def _get(cls, content_hash: str) -> Optional[bytes]:
+        """查找进程内缓存, 命中时移到最近使用的位置
+
+        Args:
+            content_hash: SVG文件内容哈希
+
+        Returns:
+            bytes | None: pickle后的Tree, 未命中返回None
+        """
+        with cls._cache_lock:
+            pickled = cls._cache.get(content_hash)
+            if pickled is not None:
+                cls._cache.move_to_end(content_hash)
+            return pickled
+
+    @classmethod
+    def _put(cls, content_hash: str, pickled: bytes) -> None:
+        """加入进程内缓存, 超过 PerformanceConfig.svg_cache_size 时淘汰最久未使用的项
+
+        Args:
+            content_hash: SVG文件内容哈希
+            pickled: pickle后的Tree
+        """
+        with cls._cache_lock:
+            cls._cache[content_hash] = pickled
+            cls._cache.move_to_end(content_hash)
+            while len(cls._cache) > max(PerformanceConfig.svg_cache_size, 0):
+                cls._cache.popitem(last=False)
+
+    @staticmethod
+    def save(pickled: bytes, cache_path: Path) -> None:
+        """保存pickle后的Tree, 先写唯一命名的临时文件再重命名, 多线程、多进程同时写入安全
+
+        Args:
+            pickled: pickle后的Tree
+            cache_path: 缓存文件路径
+        """
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=cache_path.parent, suffix=".tmp", delete=False
+            ) as temp_file:
+                temp_file.write(pickled)
+            os.replace(temp_file.name, cache_path)
+        except Exception as e:
+            print(f"    (err) 保存SVG缓存失败 {cache_path.name}: {e}")
+
+    @classmethod
+    def normalize(cls, svg_bytes: bytes) -> bytes:
+        """规范化SVG
+
+        Args:
+            svg_bytes: 原始SVG字节
+
+        Returns:
+            bytes: 规范化后的SVG字节, 无法解析时返回原始内容
+        """
+        # 含DTD的SVG可能声明实体, 交给 cairosvg 按其安全设置处理
+        if b"<!DOCTYPE" in svg_bytes:
+            return svg_bytes
+
+        try:
+            root = ET.fromstring(svg_bytes)
+        except ET.ParseError:
+            return svg_bytes
+
+        # 未声明命名空间的SVG, 元素均无命名空间
+        svg_ns = cls._namespace(root.tag)
+        style_tag = f"{{{svg_ns}}}style" if svg_ns else "style"
+
+        # 有样式表时 style 属性与样式规则的优先级需由渲染器处理, 保持不变
+        expand_style = root.find(f".//{style_tag}") is None
+        cls._clean(root, svg_ns, expand_style, in_text=False)
+
+        cls._declare_namespaces(root, svg_ns)
+        # 不写出XML声明
+        return ET.tostring(root, encoding="unicode").encode("utf-8")
+
+    @classmethod
+    def _clean(
+        cls, element: ET.Element, svg_ns: str, expand_style: bool, in_text: bool
+    ) -> None:
+        """递归清理元素
+
+        Args:
+            element: SVG元素
+            svg_ns: 根元素的命名空间
+            expand_style: 是否展开 style 属性
+            in_text: 是否位于文本元素内
+        """
+        in_text = in_text or cls._local_name(element.tag) in cls._TEXT_TAGS
+
+        for name in list(element.attrib):
+            if cls._namespace(name) not in ("", cls.XLINK_NS, cls.XML_NS):
+                del element.attrib[name]
+
+        style = element.attrib.get("style")
+        if expand_style and style is not None:
+            declarations = cls._parse_style(style)
+            if declarations is not None:
+                del element.attrib["style"]
+                element.attrib.update(declarations)
+
+        if not in_text:
+            if element.text is not None and not element.text.strip():
+                element.text = None
+            if element.tail is not None and not element.tail.strip():
+                element.tail = None
+
+        for child in list(element):
+            if (
+                cls._namespace(child.tag) != svg_ns
+                or cls._local_name(child.tag) in cls._DROPPED_TAGS
+            ):
+                # 保留被移除元素之后的文本
+                if in_text and child.tail:
+                    cls._keep_tail(element, child)
+                element.remove(child)
+            else:
+                cls._clean(child, svg_ns, expand_style, in_text)
+
+    @classmethod
+    def _declare_namespaces(cls, root: ET.Element, svg_ns: str) -> None:
+        """将元素名改为本地名, xlink属性改为 xlink: 前缀, 并在根元素上声明命名空间
+
+        输出与 register_namespace 注册默认命名空间和 xlink 前缀时相同,
+        但不修改 ElementTree 的全局前缀表
+
+        Args:
+            root: 根元素
+            svg_ns: 根元素的命名空间
+        """
+        xlink_prefix = f"{{{cls.XLINK_NS}}}"
+        uses_xlink = False
+        for element in root.iter():
+            element.tag = cls._local_name(element.tag)
+            for name in [n for n in element.attrib if n.startswith(xlink_prefix)]:
+                value = element.attrib.pop(name)
+                element.attrib[f"xlink:{cls._local_name(name)}"] = value
+                uses_xlink = True
+
+        if svg_ns:
+            root.set("xmlns", svg_ns)
+        if uses_xlink:
+            root.set("xmlns:xlink", cls.XLINK_NS)
+
+    @staticmethod
+    def _parse_style(style: str) -> Optional[Dict[str, str]]:
+        """解析 style 属性
+
+        Args:
+            style: style 属性值
+
+        Returns:
+            Dict[str, str] | None: {属性名: 属性值}, 含注释或 !important 时返回None
+        """
+        if "/*" in style or "!" in style:
+            return None
+
+        declarations = {}
+        for declaration in style.split(";"):
+            if not declaration.strip():
+                continue
+            name, sep, value = declaration.partition(":")
+            if not sep:
+                return None
+            declarations[name.strip()] = value.strip()
+        return declarations
+
+    @staticmethod
+    def _keep_tail(parent: ET.Element, child: ET.Element) -> None:
+        """将被移除元素的tail文本并入前一个兄弟元素或父元素
+
+        Args:
+            parent: 父元素
+            child: 被移除的子元素
+        """
+        children = list(parent)
+        index = children.index(child)
+        if index == 0:
+            parent.text = (parent.text or "") + child.tail
+        else:
+            previous = children[index - 1]
+            previous.tail = (previous.tail or "") + child.tail
+
+    @staticmethod
+    def _namespace(tag: str) -> str:
+        """元素名或属性名的命名空间, 没有时为空字符串"""
+        return tag[1:].split("}", 1)[0] if tag.startswith("{") else ""
+
+    @staticmethod
+    def _local_name(tag: str) -> str:
+        """去除命名空间的元素名"""
+        return tag.rsplit("}", 1)[-1]
@@ -0,0 +1,304 @@
+import sys
+import numpy as np
+import cairocffi as cairo
+
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+from cairosvg.parser import Tree
+from cairosvg.surface import PNGSurface
+
+from processors.svg_normalizer import SvgNormalizer
+
+
+class CanvasSurface(PNGSurface):
+    """绘制到预分配ARGB表面的cairosvg表面
+
+    cairosvg 默认为每次转换创建新的 ImageSurface 并编码为PNG,
+    这里直接使用调用方传入的表面, 不写出PNG。
+    覆盖的 _create_surface 不是 cairosvg 的公开接口, 由 SvgRasterizer.canvas_supported 检测是否可用
+    """
+
+    def __init__(self, tree: Tree, cairo_surface: "cairo.ImageSurface"):
+        """
+        Args:
+            tree: 解析后的SVG
+            cairo_surface: 预分配的ARGB表面, 尺寸即输出尺寸
+        """
+        self._canvas_surface = cairo_surface
+        super().__init__(
+            tree,
+            None,
+            96,
+            output_width=cairo_surface.get_width(),
+            output_height=cairo_surface.get_height(),
+        )
+
+    def _create_surface(self, width, height):
+        """返回预分配的表面 ``(cairo_surface, width, height)``"""
+        surface = self._canvas_surface
+        return surface, surface.get_width(), surface.get_height()
+
+
+class SvgRasterizer:
+    """SVG栅格化器
+
+    cairosvg 直接绘制到预分配的画布, 替代 svg2png 编码PNG -> PIL解码 -> 粘贴到透明画布:
+    1. 画布为 (size, size, 4) 的NumPy数组, cairo表面与其共用内存, 图标区域为居中偏移处的子表面
+    2. 绘制完成后直接读取数组, 没有PNG压缩、解压与额外的图像分配
+    3. 透明度与颜色按旧流程(cairo反预乘 -> Image.paste以自身为蒙版)的定点公式换算, 结果逐像素一致
+    4. 首次使用时检测能否绘制到预分配画布, 不能时(cairosvg/cairocffi 版本不兼容)改用PNG编码流程(render_png)
+    """
+
+    # cairo ARGB32 按本机字节序存储32位像素, 小端序下字节依次为 B, G, R, A
+    _CHANNELS = (2, 1, 0, 3) if sys.byteorder == "little" else (1, 2, 3, 0)
+
+    # Image.paste 以自身alpha为蒙版粘贴到透明画布: a * a / 255 的定点舍入
+    _PASTE_LUT = np.array(
+        [(a * a + 128 + ((a * a + 128) >> 8)) >> 8 for a in range(256)],
+        dtype=np.uint8,
+    )
+
+    # 检测用的SVG, 填满 4x4 画布
+    _PROBE_SVG = (
+        b'<svg xmlns="http://www.w3.org/2000/svg" width="4" height="4">'
+        b'<rect width="4" height="4"/></svg>'
+    )
+
+    # 能否绘制到预分配画布, 首次使用时检测
+    _canvas_supported: Optional[bool] = None
+
+    @classmethod
+    def canvas_supported(cls) -> bool:
+        """检测能否直接绘制到预分配画布
+
+        绘制检测用的SVG, 画布被完全覆盖才可用。
+        覆盖私有接口失败、或cairo未写入画布内存时, 输出一次提示并改用PNG编码流程
+
+        Returns:
+            bool: 可用返回True
+        """
+        if cls._canvas_supported is None:
+            canvas = np.zeros((4, 4, 4), dtype=np.uint8)
+            try:
+                cls._draw(Tree(bytestring=cls._PROBE_SVG), canvas, 4, 0)
+                supported = bool(canvas[..., cls._CHANNELS[3]].all())
+                reason = "画布未被写入"
+            except Exception as e:
+                supported = False
+                reason = repr(e)
+            if not supported:
+                print(
+                    f"    (err) SvgRasterizer: 无法直接绘制到预分配画布, 改用PNG编码流程: {reason}"
+                )
+            cls._canvas_supported = supported
+        return cls._canvas_supported
+
+    @classmethod
+    def use_canvas(cls, icon_size: int, icon_scale: float) -> bool:
+        """能否直接绘制到画布
+
+        缩放后大于画布时居中偏移为负, 子表面无法表示超出画布的部分,
+        改用PNG编码流程, 由 Image.paste 裁剪
+
+        Args:
+            icon_size: 画布尺寸
+            icon_scale: 缩放比例
+
+        Returns:
+            bool: 可用返回True
+        """
+        return int(icon_size * icon_scale) <= icon_size and cls.canvas_supported()
+
+    @classmethod
+    def render_rgba(
+        cls,
+        svg_path: str,
+        icon_size: int,
+        icon_scale: float,
+        content_hash: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """将SVG居中绘制到透明画布, 得到RGBA图像数据
+
+        Args:
+            svg_path: SVG文件路径
+            icon_size: 画布尺寸
+            icon_scale: 缩放比例
+            content_hash: SVG文件内容哈希, 用于查找SVG解析缓存, 为None时由文件内容计算
+
+        Returns:
+            np.ndarray | None: shape为(icon_size, icon_size, 4)的uint8数组, 失败返回None
+        """
+        if not cls.use_canvas(icon_size, icon_scale):
+            return cls.render_png(svg_path, icon_size, icon_scale, content_hash)
+
+        canvas = cls.render_canvas(svg_path, icon_size, icon_scale, content_hash)
+        return None if canvas is None else cls.canvas_rgba(canvas)
+
+    @classmethod
+    def render_alpha(
+        cls,
+        svg_path: str,
+        icon_size: int,
+        icon_scale: float,
+        content_hash: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """将SVG居中绘制到透明画布, 得到alpha覆盖率
+
+        Args:
+            svg_path: SVG文件路径
+            icon_size: 画布尺寸
+            icon_scale: 缩放比例
+            content_hash: SVG文件内容哈希, 用于查找SVG解析缓存, 为None时由文件内容计算
+
+        Returns:
+            np.ndarray | None: shape为(icon_size, icon_size)的uint8数组, 失败返回None
+        """
+        if not cls.use_canvas(icon_size, icon_scale):
+            rgba = cls.render_png(svg_path, icon_size, icon_scale, content_hash)
+            return None if rgba is None else rgba[..., 3]
+
+        canvas = cls.render_canvas(svg_path, icon_size, icon_scale, content_hash)
+        return None if canvas is None else cls.canvas_alpha(canvas)
+
+    @classmethod
+    def render_png(
+        cls,
+        svg_path: str,
+        icon_size: int,
+        icon_scale: float,
+        content_hash: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """cairosvg 编码PNG -> PIL解码 -> 粘贴到透明画布, 无法直接绘制到画布时使用
+
+        Args:
+            svg_path: SVG文件路径
+            icon_size: 画布尺寸
+            icon_scale: 缩放比例
+            content_hash: SVG文件内容哈希, 用于查找SVG解析缓存, 为None时由文件内容计算
+
+        Returns:
+            np.ndarray | None: shape为(icon_size, icon_size, 4)的uint8数组, 失败返回None
+        """
+        icon_actual_size = int(icon_size * icon_scale)
+        offset = (icon_size - icon_actual_size) // 2
+
+        try:
+            # 与 svg2png 相同的PNG表面, 绘制缓存的解析结果
+            output = BytesIO()
+            PNGSurface(
+                SvgNormalizer.load(svg_path, content_hash),
+                output,
+                96,
+                output_width=icon_actual_size,
+                output_height=icon_actual_size,
+            ).finish()
+            png_data = output.getvalue()
+        except Exception as e:
+            print(f"Error processing SVG {svg_path}: {e}")
+            return None
+
+        icon = Image.open(BytesIO(png_data))
+        final_icon = Image.new("RGBA", (icon_size, icon_size), (0, 0, 0, 0))
+        final_icon.paste(icon, (offset, offset), icon)
+        return np.asarray(final_icon)
+
+    @classmethod
+    def render_canvas(
+        cls,
+        svg_path: str,
+        icon_size: int,
+        icon_scale: float,
+        content_hash: Optional[str] = None,
+    ) -> Optional[np.ndarray]:
+        """将SVG居中绘制到预分配的ARGB画布, 缩放后的尺寸不能大于画布, 见 use_canvas
+
+        Args:
+            svg_path: SVG文件路径
+            icon_size: 画布尺寸
+            icon_scale: 缩放比例
+            content_hash: SVG文件内容哈希, 用于查找SVG解析缓存, 为None时由文件内容计算
+
+        Returns:
+            np.ndarray | None: shape为(icon_size, icon_size, 4)的uint8数组,
+                cairo预乘ARGB32的原始字节, 失败返回None
+        """
+        # 缩放后实际大小, 与旧流程的粘贴位置一致
+        icon_actual_size = int(icon_size * icon_scale)
+        offset = (icon_size - icon_actual_size) // 2
+        if offset < 0:
+            print(f"Error processing SVG {svg_path}: 缩放后尺寸 {icon_actual_size} 大于画布")
+            return None
+
+        canvas = np.zeros((icon_size, icon_size, 4), dtype=np.uint8)
+
+        try:
+            # 解析后的SVG按内容哈希缓存, 同一SVG的不同尺寸、颜色只读取和解析一次
+            tree = SvgNormalizer.load(svg_path, content_hash)
+            cls._draw(tree, canvas, icon_actual_size, offset)
+        except Exception as e:
+            print(f"Error processing SVG {svg_path}: {e}")
+            return None
+
+        return canvas
+
+    @staticmethod
+    def _draw(tree: Tree, canvas: np.ndarray, size: int, offset: int) -> None:
+        """将解析后的SVG绘制到画布的 (offset, offset) 处
+
+        Args:
+            tree: 解析后的SVG
+            canvas: shape为(H, W, 4)的uint8画布
+            size: 绘制尺寸
+            offset: 绘制区域左上角在画布中的行列偏移
+        """
+        stride = canvas.shape[1] * 4
+        start = offset * stride + offset * 4
+
+        # 子表面从偏移处开始, 沿用画布的行跨度, 绘制范围即粘贴区域
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            size,
+            size,
+            data=memoryview(canvas).cast("B")[start:],
+            stride=stride,
+        )
+        CanvasSurface(tree, surface).finish()
+
+    @classmethod
+    def canvas_alpha(cls, canvas: np.ndarray) -> np.ndarray:
+        """由画布得到alpha覆盖率
+
+        Args:
+            canvas: render_canvas 的输出
+
+        Returns:
+            np.ndarray: shape为(H, W)的uint8数组
+        """
+        return cls._PASTE_LUT[canvas[..., cls._CHANNELS[3]]]
+
+    @classmethod
+    def canvas_rgba(cls, canvas: np.ndarray) -> np.ndarray:
+        """由画布得到RGBA图像数据
+
+        Args:
+            canvas: render_canvas 的输出
+
+        Returns:
+            np.ndarray: shape为(H, W, 4)的uint8数组
+        """
+        alpha = canvas[..., cls._CHANNELS[3]].astype(np.uint32)
+        premultiplied = canvas[..., list(cls._CHANNELS[:3])].astype(np.uint32)
+
+        # cairo写出PNG时的反预乘, alpha为0时颜色为0
+        safe_alpha = np.maximum(alpha, 1)[..., None]
+        straight = (premultiplied * 255 + safe_alpha // 2) // safe_alpha
+        straight[alpha == 0] = 0
+
+        # Image.paste 以自身alpha为蒙版粘贴到透明画布
+        blended = straight * alpha[..., None] + 128
+        output = np.empty(canvas.shape, dtype=np.uint8)
+        output[..., :3] = (blended + (blended >> 8)) >> 8
+        output[..., 3] = cls._PASTE_LUT[alpha]
+        return output
@@ -4,6 +4,8 @@ import zipfile
 
 from pathlib import Path
 
+from processors.icon_zip_sink import IconZipSink
+
 
 class ThemePacker:
     """主题打包器
@@ -14,10 +16,24 @@ class ThemePacker:
     # 3. 生成MTZ主题包
     """
 
+    @classmethod
+    def open_icons_zip(cls, icons_template_dir: str) -> IconZipSink:
+        """创建 icons.zip 写入器, 渲染后的图标直接写入压缩包
+
+        Args:
+            icons_template_dir: 图标模板目录
+
+        Returns:
+            IconZipSink: 图标压缩包写入器
+        """
+        # 移除上一次打包生成的 icons, 避免被再次打包
+        (Path(icons_template_dir) / "icons").unlink(missing_ok=True)
+        return IconZipSink(Path(icons_template_dir) / "icons.zip").open()
+
     @classmethod
     def pack_icons_zip(
         cls,
-        output_dir: str,
+        icon_sink: IconZipSink,
         icons_template_dir: str,
         mtz_template_dir: str,
         magisk_template_dir: str,
@@ -25,44 +41,28 @@ class ThemePacker:
         """打包图标资源为zip
 
         Args:
-            output_dir: 图标输出目录
+            icon_sink: 已写入图标的压缩包写入器
             icons_template_dir: 图标模板目录
             mtz_template_dir: MTZ模板目录
             magisk_template_dir: Magisk模板目录
         """
-        icons_template_drawable_dir = (
-            Path(icons_template_dir) / "res" / "drawable-xxhdpi"
+        # 写入 icons 模板目录中的其余文件
+        print(
+            "  (1/5) ThemePacker.pack_icons_zip: 正在写入 icons_template 模板文件"
         )
+        icon_sink.write_tree(Path(icons_template_dir))
 
-        # 移动所有图标到 icons 模板的 drawable-xxhdpi 目录
-        # print("  (1/7) ThemePacker.pack_icons_zip: 从 output 移动图标到 icons_template")
-        print("  (1/5) ThemePacker.pack_icons_zip: 从 output 移动图标到 icons_template")
-        for item in Path(output_dir).iterdir():
-            if item.is_dir():
-                shutil.move(item, icons_template_drawable_dir / item.name)
-
-        # 打包 icons 模板目录
-        # print(
-        #     "  (2/7) ThemePacker.pack_icons_zip: 正在使用 zipfile 封装 icons_template"
-        # )
+        # 等待写入完成
+        icon_sink.close()
         print(
-            "  (2/5) ThemePacker.pack_icons_zip: 正在使用 zipfile 封装 icons_template"
+            f"  (2/5) ThemePacker.pack_icons_zip: icons.zip 已写入 {icon_sink.written_count} 个文件"
         )
-        temp_icons_zip = Path(icons_template_dir) / "icons.zip"
-
-        with zipfile.ZipFile(temp_icons_zip, "w", zipfile.ZIP_STORED) as zf:
-            for root, dirs, files in os.walk(icons_template_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, icons_template_dir)
-                    if os.path.getsize(file_path) > 0:  # 只添加非空文件
-                        zf.write(file_path, arcname)
 
         # 重命名 icons.zip 为 icons, 拷贝到 mtz/magisk 模板
         # print("  (3/7) ThemePacker.pack_icons_zip: 合入 icons 到模板")
         print("  (3/5) ThemePacker.pack_icons_zip: 合入 icons 到模板")
         final_icons = Path(icons_template_dir) / "icons"
-        os.rename(temp_icons_zip, final_icons)
+        os.replace(icon_sink.zip_path, final_icons)
         shutil.copy(final_icons, mtz_template_dir)
         shutil.copy(final_icons, magisk_template_dir)
 
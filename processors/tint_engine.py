@@ -0,0 +1,63 @@
+import numpy as np
+
+from typing import Optional
+from PIL import Image, ImageColor
+
+
+class TintEngine:
+    """前景色着色引擎
+
+    以整张数组为单位为图标着色, 替代逐像素的 getdata/putdata 循环:
+    1. 读取栅格化后的alpha通道
+    2. 一次广播运算生成RGBA输出
+    3. 透明度保持不变, 仅替换非透明像素的颜色
+    """
+
+    @staticmethod
+    def parse_color(color: str) -> np.ndarray:
+        """解析颜色字符串为RGB数组
+
+        Args:
+            color: 颜色字符串, 例如 "#d1e2fc"
+
+        Returns:
+            np.ndarray: shape为(3,)的uint8数组
+        """
+        return np.array(ImageColor.getrgb(color)[:3], dtype=np.uint8)
+
+    @classmethod
+    def tint_alpha(
+        cls, alpha: np.ndarray, fg_color: str, rgb: Optional[np.ndarray] = None
+    ) -> Image.Image:
+        """由alpha通道生成着色后的RGBA图像
+
+        Args:
+            alpha: alpha通道, shape为(H, W)的uint8数组
+            fg_color: 前景色
+            rgb: 原始RGB通道, 可选。完全透明像素保留其原始颜色, 为None时置0
+
+        Returns:
+            Image.Image: 着色后的RGBA图像
+        """
+        fg_rgb = cls.parse_color(fg_color)
+        background = 0 if rgb is None else rgb
+
+        output = np.empty((*alpha.shape, 4), dtype=np.uint8)
+        output[..., :3] = np.where(alpha[..., None] != 0, fg_rgb, background)
+        output[..., 3] = alpha
+
+        return Image.fromarray(output, "RGBA")
+
+    @classmethod
+    def tint_image(cls, image: Image.Image, fg_color: str) -> Image.Image:
+        """为RGBA图像着色
+
+        Args:
+            image: RGBA图像
+            fg_color: 前景色
+
+        Returns:
+            Image.Image: 着色后的RGBA图像
+        """
+        data = np.asarray(image.convert("RGBA"))
+        return cls.tint_alpha(data[..., 3], fg_color, data[..., :3])
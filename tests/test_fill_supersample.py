@@ -0,0 +1,83 @@
+import sys
+import pytest
+import numpy as np
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import cairosvg  # noqa: F401
+except (ImportError, OSError) as e:
+    # cairocffi 找不到 libcairo 时抛出 OSError
+    pytest.skip(f"cairosvg 不可用: {e}", allow_module_level=True)
+
+from configs.config import IconConfig, LawniconsPathConfig, PerformanceConfig
+from processors.fill_icon_processor import FillIconProcessor, FillRenderContext
+from processors.render_plan import RenderPlan
+
+# mask 方式与 full 方式的允许偏差, 与 PerformanceConfig.fill_supersample_mode 注释一致
+# 按预乘alpha后的RGBA比较, 近乎透明像素的颜色不计入
+#   逐通道平均差异
+MAX_MEAN_DIFF = 0.7
+#   差异大于 LARGE_DIFF 的通道占比
+LARGE_DIFF = 32
+MAX_LARGE_DIFF_RATIO = 0.006
+
+
+def premultiply(icon: np.ndarray) -> np.ndarray:
+    """RGB通道乘以alpha, 返回int32数组"""
+    icon = icon.astype(np.int32)
+    icon[..., :3] = (icon[..., :3] * icon[..., 3:] + 127) // 255
+    return icon
+
+
+def render_icons(tasks, mode: str):
+    """依次执行栅格化、蒙版、合成阶段, 返回 {内容哈希: 预乘alpha的图标数组}"""
+    context = FillRenderContext(
+        IconConfig.fg_color,
+        "#3a4f66",
+        IconConfig.icon_size,
+        IconConfig.icon_scale,
+        PerformanceConfig.supersampling_scale,
+        False,
+        mode,
+    )
+    stages = FillIconProcessor.render_stages()[:-1]  # 不含编码阶段
+    icons = {}
+    for task in tasks:
+        payload = None
+        for stage in stages:
+            payload = stage.func(task, context, payload)
+            if payload is None:
+                break
+        if payload is not None:
+            icons[task.content_hash] = premultiply(np.asarray(payload[0]))
+    return icons
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    # 不读写构建缓存
+    monkeypatch.setattr(PerformanceConfig, "enable_raster_cache", False)
+
+    svg_dir = LawniconsPathConfig.get_svg_dir(True)
+    svg_paths = sorted(svg_dir.glob("*.svg"))
+    tasks, _ = RenderPlan.build({p.stem: p.stem for p in svg_paths}, svg_dir)
+    assert tasks, f"未找到SVG: {svg_dir}"
+    return tasks
+
+
+def test_mask_mode_matches_full_supersample(tasks):
+    full = render_icons(tasks, "full")
+    mask = render_icons(tasks, "mask")
+    assert full.keys() == mask.keys()
+
+    diff = np.stack([np.abs(full[key] - mask[key]) for key in full])
+    mean_diff = diff.mean()
+    large_ratio = np.mean(diff > LARGE_DIFF)
+
+    assert mean_diff <= MAX_MEAN_DIFF, f"平均差异 {mean_diff:.3f}"
+    assert large_ratio <= MAX_LARGE_DIFF_RATIO, (
+        f"差异大于{LARGE_DIFF}的通道占比 {large_ratio * 100:.3f}%"
+    )
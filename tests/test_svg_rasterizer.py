@@ -0,0 +1,53 @@
+import sys
+import pytest
+import numpy as np
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import cairosvg  # noqa: F401
+except (ImportError, OSError) as e:
+    # cairocffi 找不到 libcairo 时抛出 OSError
+    pytest.skip(f"cairosvg 不可用: {e}", allow_module_level=True)
+
+from configs.config import IconConfig, LawniconsPathConfig, PerformanceConfig
+from processors.svg_rasterizer import SvgRasterizer
+
+SVG_PATHS = sorted(LawniconsPathConfig.get_svg_dir(True).glob("*.svg"))
+
+
+@pytest.fixture(autouse=True)
+def no_svg_cache(monkeypatch):
+    # 不读写构建缓存
+    monkeypatch.setattr(PerformanceConfig, "enable_svg_cache", False)
+
+
+def test_canvas_supported():
+    assert SvgRasterizer.canvas_supported()
+
+
+@pytest.mark.parametrize("svg_path", SVG_PATHS, ids=lambda p: p.stem)
+def test_canvas_matches_png(svg_path):
+    size, scale = IconConfig.icon_size, IconConfig.icon_scale
+    expected = SvgRasterizer.render_png(str(svg_path), size, scale)
+    assert expected is not None
+
+    rgba = SvgRasterizer.render_rgba(str(svg_path), size, scale)
+    alpha = SvgRasterizer.render_alpha(str(svg_path), size, scale)
+    np.testing.assert_array_equal(rgba, expected)
+    np.testing.assert_array_equal(alpha, expected[..., 3])
+
+
+def test_scale_larger_than_canvas():
+    # 缩放后大于画布时改用PNG编码流程, 居中裁剪
+    svg_path = str(SVG_PATHS[0])
+    size, scale = 64, 1.5
+    assert not SvgRasterizer.use_canvas(size, scale)
+
+    rgba = SvgRasterizer.render_rgba(svg_path, size, scale)
+    alpha = SvgRasterizer.render_alpha(svg_path, size, scale)
+    assert rgba.shape == (size, size, 4)
+    np.testing.assert_array_equal(alpha, rgba[..., 3])
+    assert SvgRasterizer.render_canvas(svg_path, size, scale) is None